@@ -0,0 +1,204 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 历史菜单存档：只追加，不覆盖。不放在 .cache 里（actions/cache 随时可能被清掉），
+# workflow 每次运行前从 GitHub release "menu-archive" 取回，运行后再传回去
+ARCHIVE_PATH = os.environ.get("WOLFIE_ARCHIVE", "archive.sqlite")
+
+# 设为 "0" 可关闭存档（例如本地调试 scraper 时）
+ENABLED = os.environ.get("WOLFIE_ARCHIVE_ENABLED") != "0"
+
+# workflow 确认 release 上已有存档时设为 "1"。这时本地没有存档文件说明取回失败：
+# 不能悄悄新建一个空库，否则运行结束后会把它传上去覆盖掉全部历史
+EXPECTED = os.environ.get("WOLFIE_ARCHIVE_EXPECTED") == "1"
+
+
+class ArchiveMissing(RuntimeError):
+    """A previous archive was expected at ARCHIVE_PATH but is not there."""
+
+
+def check_expected(path: Optional[str] = None) -> None:
+    path = path or ARCHIVE_PATH
+    if EXPECTED and not os.path.exists(path):
+        raise ArchiveMissing(f"Expected the previous menu archive at {path}, but it is missing")
+
+# 菜名、档口名、地点只存一次，servings 里只放整数 ID。
+# servings 的主键以 food_id 开头，"某道菜最近一次出现" 只需扫主键上的一小段。
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS foods_name_nocase ON foods (name COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS servings (
+    food_id INTEGER NOT NULL REFERENCES foods (id),
+    location_id INTEGER NOT NULL REFERENCES locations (id),
+    menu_date TEXT NOT NULL,
+    meal TEXT NOT NULL,
+    section_id INTEGER NOT NULL REFERENCES sections (id),
+    first_seen TEXT NOT NULL,
+    PRIMARY KEY (food_id, location_id, menu_date, meal, section_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS servings_by_day ON servings (location_id, menu_date);
+"""
+
+_lock = threading.Lock()
+
+# (menu_date, meal, section, food)；档口类地点的 meal 为 ""
+Row = Tuple[str, str, str, str]
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    path = path or ARCHIVE_PATH
+    check_expected(path)
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def rows_from_output(payload: Dict[str, Any], statuses: Tuple[str, ...] = ("ok",)) -> Iterator[Row]:
+    """Flatten one location output file (dining-hall or station layout) into rows.
+
+    Station sections are kept only when their status is in `statuses`.
+    """
+    if isinstance(payload.get("meals"), dict):
+        date = payload.get("date")
+        if not date:
+            return
+        for meal, blocks in payload["meals"].items():
+            for block in blocks or []:
+                for food in block.get("items") or []:
+                    yield date, meal, block.get("section") or "Other", food
+        return
+
+    for sec in payload.get("sections") or []:
+        # chain 档口的 items 只是 "去官网看菜单" 的链接文字
+        if sec.get("type") == "chain" or sec.get("status", "ok") not in statuses:
+            continue
+        date = (
+            sec.get("date")
+            or sec.get("menu_date")
+            or payload.get("date_fetched_from")
+            or payload.get("date")
+        )
+        if not date:
+            continue
+        for food in sec.get("items") or []:
+            yield date, "", sec.get("section") or "Other", food
+
+
+def _ids(conn: sqlite3.Connection, table: str, names: List[str]) -> Dict[str, int]:
+    conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(n,) for n in names])
+    ids: Dict[str, int] = {}
+    for i in range(0, len(names), 500):
+        chunk = names[i : i + 500]
+        marks = ",".join("?" * len(chunk))
+        ids.update(conn.execute(f"SELECT name, id FROM {table} WHERE name IN ({marks})", chunk))
+    return ids
+
+
+def record(location: str, rows: List[Row], path: Optional[str] = None) -> int:
+    """Append rows for one location; rows already archived are ignored. Returns rows added."""
+    rows = [r for r in rows if isinstance(r[3], str) and r[3].strip()]
+    if not rows:
+        return 0
+    now = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    with _lock:
+        conn = connect(path)
+        try:
+            with conn:
+                loc_id = _ids(conn, "locations", [location])[location]
+                food_ids = _ids(conn, "foods", sorted({r[3] for r in rows}))
+                section_ids = _ids(conn, "sections", sorted({r[2] for r in rows}))
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO servings VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (food_ids[food], loc_id, date, meal, section_ids[section], now)
+                        for date, meal, section, food in rows
+                    ],
+                )
+                return conn.total_changes - before
+        finally:
+            conn.close()
+
+
+def record_output(location: str, payload: Dict[str, Any]) -> None:
+    """Archive a scraper's output; failures are reported but never fail the scrape."""
+    if not ENABLED:
+        return
+    try:
+        record(location, list(rows_from_output(payload)))
+    except (sqlite3.Error, OSError, ArchiveMissing) as e:
+        print(f"Archive: could not record {location}: {e}")
+
+
+def last_served(
+    food: str, location: Optional[str] = None, limit: int = 1, path: Optional[str] = None
+) -> List[Tuple[str, str, str, str, str]]:
+    """Most recent servings of a food (case-insensitive exact name), newest first.
+
+    Each result is (food, location, menu_date, meal, section).
+    """
+    sql = """
+        SELECT f.name, l.name, s.menu_date, s.meal, sec.name
+        FROM foods f
+        JOIN servings s ON s.food_id = f.id
+        JOIN locations l ON l.id = s.location_id
+        JOIN sections sec ON sec.id = s.section_id
+        WHERE f.name = ? COLLATE NOCASE
+    """
+    args: List[Any] = [food]
+    if location:
+        sql += " AND l.name = ?"
+        args.append(location)
+    sql += " ORDER BY s.menu_date DESC LIMIT ?"
+    args.append(limit)
+
+    conn = connect(path)
+    try:
+        return conn.execute(sql, args).fetchall()
+    finally:
+        conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Query the local menu archive.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    last = sub.add_parser("last", help="When was a food last served?")
+    last.add_argument("food")
+    last.add_argument("--location", help="Location id from locations.json, e.g. east-hall.")
+    last.add_argument("-n", type=int, default=1, help="Number of most recent servings to show.")
+
+    args = parser.parse_args()
+
+    if args.command == "last":
+        rows = last_served(args.food, args.location, args.n)
+        if not rows:
+            print(f"No record of {args.food!r}.")
+            return 1
+        for food, loc, date, meal, section in rows:
+            when = f"{date} {meal}".strip()
+            print(f"{food}: {when} at {loc} ({section})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,294 @@
+import asyncio
+import datetime
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+import metrics
+import nutrislice_client
+import nutrislice_parse
+import week_store
+
+try:
+    import httpx
+except ImportError:  # 可选依赖；没有 httpx 时每个请求放到线程里跑同步的 nutrislice_client
+    httpx = None
+
+# 每个 host 同时在途的请求数，和 requests 连接池的上限一致
+PER_HOST_LIMIT = nutrislice_client.POOL_MAXSIZE
+
+# 一次 run_sections() / run_weeks() 的总时限（秒），另外不超过整次运行剩下的预算；到点还没完成的请求全部取消
+DEADLINE_SECONDS = 90.0
+
+DeadlineExceeded = nutrislice_client.DeadlineExceeded
+
+# (school, menu_type, date)
+WeekKey = Tuple[str, str, datetime.date]
+
+
+# httpcore trace 步骤 -> metrics 里的阶段名
+_TRACE_PHASES = {"connection.connect_tcp": "connect", "connection.start_tls": "tls"}
+
+
+def _tracer(timer: metrics.RequestTimer) -> Callable[[str, Dict[str, Any]], Coroutine[Any, Any, None]]:
+    """httpx trace extension that feeds connect/TLS/header timings into timer."""
+    started: Dict[str, float] = {}
+
+    async def trace(name: str, info: Dict[str, Any]) -> None:
+        step, _, when = name.rpartition(".")
+        if when == "started":
+            started[step] = time.perf_counter()
+        elif when == "complete":
+            if step.endswith(".receive_response_headers"):
+                timer.headers()
+            elif step in _TRACE_PHASES and step in started:
+                timer.phase(_TRACE_PHASES[step], time.perf_counter() - started.pop(step))
+
+    return trace
+
+
+class Fetcher:
+    """Concurrent Nutrislice GETs on one event loop, at most per_host in flight per host.
+
+    With httpx installed requests go through httpx.AsyncClient; otherwise the
+    synchronous nutrislice_client.get_json runs on a small thread pool. Both
+    paths share the on-disk HTTP cache and week_store with the sync scrapers.
+
+    The AsyncClient keeps its own connection pool next to the shared requests
+    Session: a urllib3 pool cannot serve coroutines, and an httpx pool is tied
+    to the event loop it was opened on, so it lives as long as the Fetcher.
+    """
+
+    def __init__(self, per_host: int = PER_HOST_LIMIT):
+        self.per_host = per_host
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._client: Any = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    async def __aenter__(self) -> "Fetcher":
+        if httpx is not None:
+            connect, read = nutrislice_client.TIMEOUT
+            self._client = httpx.AsyncClient(
+                headers=nutrislice_client.HEADERS,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.per_host),
+                follow_redirects=True,
+            )
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=self.per_host)
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._pool is not None:
+            # 线程里的请求取消不了；不等它们，各自的超时会让它们结束
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _slot(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Any:
+        """Async twin of nutrislice_client.get(): same retry, backoff and rate limit."""
+        attempt = 0
+        while True:
+            if nutrislice_client.RATE_LIMITER is not None:
+                await asyncio.to_thread(nutrislice_client.RATE_LIMITER.acquire)
+            nutrislice_client.check_deadline(url)
+            timer = metrics.RequestTimer(url, attempt, "httpx")
+            try:
+                r = await self._client.get(url, headers=headers, extensions={"trace": _tracer(timer)})
+            except httpx.TransportError as e:
+                timer.done(error=type(e).__name__)
+                if attempt >= nutrislice_client.MAX_RETRIES:
+                    raise
+                delay = nutrislice_client.backoff_delay(attempt)
+                nutrislice_client.check_deadline(url, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            except asyncio.CancelledError:
+                # 多半是 deadline 到了；记下来才看得出是哪个请求拖住了
+                timer.done(error="CancelledError")
+                raise
+            timer.done(r.status_code, len(r.content), r.num_bytes_downloaded)
+
+            if r.status_code in nutrislice_client.RETRY_STATUSES and attempt < nutrislice_client.MAX_RETRIES:
+                delay = nutrislice_client.backoff_delay(attempt, r.headers.get("Retry-After"))
+                nutrislice_client.check_deadline(url, delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+
+            if r.status_code != 304:
+                r.raise_for_status()
+            return r
+
+    async def get_json(self, url: str, parse: Optional[Callable[[bytes], Any]] = None) -> Any:
+        """Async twin of nutrislice_client.get_json()."""
+        decode = parse or json.loads
+        async with self._slot(url):
+            if self._client is None:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._pool, nutrislice_client.get_json, url, parse)
+
+            cache = nutrislice_client.CACHE
+            if cache is None:
+                return nutrislice_client.timed_decode(url, (await self._get(url)).content, decode)
+
+            parser = getattr(decode, "__qualname__", "")
+            meta = cache.lookup(url, parser)
+            r = await self._get(url, cache.conditional_headers(meta))
+            if r.status_code == 304 and meta:
+                try:
+                    payload = cache.load(url)
+                except Exception:
+                    payload = None
+                else:
+                    cache.revalidated(url, meta)
+                    return payload
+                r = await self._get(url)
+
+            payload = nutrislice_client.timed_decode(url, r.content, decode)
+            cache.store(url, r.headers, payload, parser)
+            return payload
+
+    async def week(self, school: str, menu_type: str, d: datetime.date) -> Dict[str, Any]:
+        """Async twin of week_store.get_week(), sharing its single-flight with sync callers."""
+        data = week_store.lookup(school, menu_type, d)
+        if data is not None:
+            return data
+        fut, owner = week_store.claim(school, menu_type, d)
+        if not owner:
+            # shield：这里超时被取消时不能连带取消别人发起的请求
+            return await asyncio.shield(asyncio.wrap_future(fut))
+        try:
+            data = await self.get_json(
+                nutrislice_client.week_url(school, menu_type, d), parse=nutrislice_parse.parse_week
+            )
+        except BaseException as e:
+            week_store.fail(school, menu_type, d, e)
+            raise
+        return week_store.remember(school, menu_type, d, data)
+
+
+def _section(school: str, menu_type: str, d: datetime.date) -> Dict[str, Any]:
+    return {
+        "school": school,
+        "menu_type": menu_type,
+        "date": d.strftime("%Y-%m-%d"),
+        "source_url": nutrislice_client.week_url(school, menu_type, d),
+        "status": "ok",
+        "message": "",
+        "items": [],
+    }
+
+
+def _failed(result: Dict[str, Any], exc: BaseException) -> Dict[str, Any]:
+    # 没赶上截止时间的档口标成 stale，由 publish.fill_stale() 换成上次发布的内容
+    result["status"] = "stale" if isinstance(exc, DeadlineExceeded) else "fetch_error"
+    result["message"] = f"Error: {exc}"
+    return result
+
+
+async def fetch_section(
+    fetcher: Fetcher,
+    school: str,
+    menu_type: str,
+    d: datetime.date,
+    rules: Dict[str, Any],
+    detect_closed: bool = False,
+) -> Dict[str, Any]:
+    """One station's day as a section: school, menu_type, date, source_url, status, message, items."""
+    result = _section(school, menu_type, d)
+    try:
+        data = await fetcher.week(school, menu_type, d)
+    except Exception as e:
+        return _failed(result, e)
+    result["status"], result["message"], result["items"] = nutrislice_parse.day_result(
+        data, result["date"], rules, detect_closed
+    )
+    return result
+
+
+async def _until(coros: List[Coroutine[Any, Any, Any]], deadline: float) -> List[Any]:
+    """Run coros concurrently; each result in order, or the exception it raised.
+
+    Whatever is still running after deadline seconds (or when the run
+    budget runs out, if sooner) is cancelled and reported as DeadlineExceeded.
+    Work that needs no I/O still finishes when no time is left.
+    """
+    deadline = nutrislice_client.within_budget(deadline)
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    if not tasks:
+        return []
+    # 先让每个任务跑一步：已经在内存里的周数据不需要等待，截止时间到了也能直接用上
+    await asyncio.sleep(0)
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for t in pending:
+        t.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+    out: List[Any] = []
+    for t in tasks:
+        if t not in done:
+            out.append(DeadlineExceeded(f"Not finished within {deadline:.3g}s"))
+        elif t.exception() is not None:
+            out.append(t.exception())
+        else:
+            out.append(t.result())
+    return out
+
+
+async def fetch_sections(
+    specs: Sequence[WeekKey],
+    rules: Dict[str, Any],
+    detect_closed: bool = False,
+    deadline: float = DEADLINE_SECONDS,
+    per_host: int = PER_HOST_LIMIT,
+) -> List[Dict[str, Any]]:
+    async with Fetcher(per_host) as fetcher:
+        results = await _until(
+            [fetch_section(fetcher, school, menu_type, d, rules, detect_closed) for school, menu_type, d in specs],
+            deadline,
+        )
+    out = []
+    for (school, menu_type, d), r in zip(specs, results):
+        if isinstance(r, BaseException):
+            r = _failed(_section(school, menu_type, d), r)
+        out.append(r)
+    return out
+
+
+async def fetch_weeks(
+    keys: Sequence[WeekKey], deadline: float = DEADLINE_SECONDS, per_host: int = PER_HOST_LIMIT
+) -> Dict[WeekKey, Union[Dict[str, Any], BaseException]]:
+    async with Fetcher(per_host) as fetcher:
+        results = await _until([fetcher.week(*key) for key in keys], deadline)
+    return dict(zip(keys, results))
+
+
+def run_sections(
+    specs: Sequence[WeekKey],
+    rules: Dict[str, Any],
+    detect_closed: bool = False,
+    deadline: float = DEADLINE_SECONDS,
+    per_host: int = PER_HOST_LIMIT,
+) -> List[Dict[str, Any]]:
+    """fetch_section() results for (school, menu_type, date) specs, in order, from sync code."""
+    return asyncio.run(fetch_sections(specs, rules, detect_closed, deadline, per_host))
+
+
+def run_weeks(
+    keys: Sequence[WeekKey], deadline: float = DEADLINE_SECONDS, per_host: int = PER_HOST_LIMIT
+) -> Dict[WeekKey, Union[Dict[str, Any], BaseException]]:
+    """Weekly payload (or the exception) for each key, from sync code."""
+    return asyncio.run(fetch_weeks(keys, deadline, per_host))
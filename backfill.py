@@ -0,0 +1,211 @@
+import argparse
+import datetime
+import importlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Set, Tuple
+
+import archive
+import locations
+import nutrislice_client
+import nutrislice_parse
+import week_store
+
+CHECKPOINT_FILE = os.path.join(os.environ.get("WOLFIE_CACHE_DIR", ".cache"), "backfill_checkpoint.json")
+
+# 默认每秒 2 个请求、最多连发 4 个；一学期 (~20 周 x 18 个菜单) 大约 3 分钟
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 4
+DEFAULT_WORKERS = 4
+
+# (school, menu_type, week_start)
+WeekKey = Tuple[str, str, datetime.date]
+
+
+def resolve_locations(names: List[str]) -> List[Dict[str, Any]]:
+    """Registry entries for ids like "east-hall", or unambiguous prefixes like "east"."""
+    fetchable = [loc for loc in locations.all_locations() if locations.fetch_stations(loc["id"])]
+    if not names:
+        return fetchable
+
+    out = []
+    for name in names:
+        exact = [loc for loc in fetchable if loc["id"] == name]
+        matches = exact or [loc for loc in fetchable if loc["id"].startswith(name + "-")]
+        if len(matches) != 1:
+            known = ", ".join(loc["id"] for loc in fetchable)
+            raise SystemExit(f"Unknown or ambiguous location {name!r} (choose from: {known})")
+        if matches[0] not in out:
+            out.append(matches[0])
+    return out
+
+
+def plan_weeks(locs: List[Dict[str, Any]], start: datetime.date, end: datetime.date) -> List[WeekKey]:
+    """The minimal set of week requests covering [start, end] for every station of locs."""
+    first = week_store.week_start(start)
+    menus = dict.fromkeys(
+        (s["school"], s["menu_type"]) for loc in locs for s in locations.fetch_stations(loc["id"])
+    )
+    plan = []
+    for school, menu_type in menus:
+        week = first
+        while week <= end:
+            plan.append((school, menu_type, week))
+            week += datetime.timedelta(days=7)
+    return plan
+
+
+def key_str(key: WeekKey) -> str:
+    school, menu_type, week = key
+    return f"{school}/{menu_type}/{week.isoformat()}"
+
+
+def day_keys(key: WeekKey, start: datetime.date, end: datetime.date) -> List[str]:
+    """"school/menu_type/date" for each day of the week that falls inside [start, end]."""
+    school, menu_type, week = key
+    days = (week + datetime.timedelta(days=i) for i in range(7))
+    return [f"{school}/{menu_type}/{d.isoformat()}" for d in days if start <= d <= end]
+
+
+class Checkpoint:
+    """Days already archived, saved after every completed week so a rerun resumes.
+
+    Done is kept per day rather than per week: a week fetched for a narrow
+    range is fetched again when a later, wider range needs its other days.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.done: Set[str] = set(json.load(f).get("done", []))
+        except (OSError, ValueError):
+            self.done = set()
+
+    def covers(self, key: WeekKey, start: datetime.date, end: datetime.date) -> bool:
+        return all(day in self.done for day in day_keys(key, start, end))
+
+    def mark_done(self, key: WeekKey, start: datetime.date, end: datetime.date) -> None:
+        with self._lock:
+            self.done.update(day_keys(key, start, end))
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"done": sorted(self.done)}, f)
+            os.replace(tmp, self.path)
+
+
+def _section_rules(loc: Dict[str, Any]) -> Dict[str, Any]:
+    spec = loc.get("scraper") or "sac_scrape:scrape_location"
+    return importlib.import_module(spec.split(":")[0]).SECTION_RULES
+
+
+def day_payload(loc: Dict[str, Any], station: Dict[str, Any], date_str: str, menu_items: List[Any]) -> Dict[str, Any]:
+    """Shape one day of one station like the location's output file, for the archive."""
+    if loc["layout"] == "dining-hall":
+        module = importlib.import_module(loc["scraper"].split(":")[0])
+        is_weekend = datetime.date.fromisoformat(date_str).weekday() >= 5
+        return {"date": date_str, "meals": module.categorize_meals(menu_items, is_weekend)}
+
+    section_map = nutrislice_parse.walk_sections(menu_items, _section_rules(loc))
+    if loc["layout"] == "single":
+        sections = [{"section": sec, "items": items} for sec, items in section_map.items() if items]
+    else:
+        sections = [{"section": station["section"], "items": nutrislice_parse.flatten_sections(section_map)}]
+    return {"date": date_str, "sections": sections}
+
+
+def archive_week(
+    key: WeekKey, data: Dict[str, Any], locs: List[Dict[str, Any]], start: datetime.date, end: datetime.date
+) -> int:
+    school, menu_type, _ = key
+    added = 0
+    for day in data.get("days", []):
+        date_str = day.get("date")
+        if not isinstance(date_str, str) or not (start.isoformat() <= date_str <= end.isoformat()):
+            continue
+        menu_items = day.get("menu_items") or []
+        if not menu_items or nutrislice_parse.closed_message(menu_items) is not None:
+            continue
+        for loc in locs:
+            for station in locations.fetch_stations(loc["id"]):
+                if (station["school"], station["menu_type"]) != (school, menu_type):
+                    continue
+                payload = day_payload(loc, station, date_str, menu_items)
+                added += archive.record(loc["id"], list(archive.rows_from_output(payload)))
+    return added
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Archive past Nutrislice menus for a date range.")
+    parser.add_argument("--from", dest="start", required=True, type=datetime.date.fromisoformat)
+    parser.add_argument("--to", dest="end", required=True, type=datetime.date.fromisoformat)
+    parser.add_argument(
+        "--locations",
+        default="",
+        help="Comma-separated location ids or prefixes, e.g. east,west,sac (default: all).",
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="Requests per second.")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and fetch every week.")
+    args = parser.parse_args()
+
+    if args.end < args.start:
+        raise SystemExit("--to must not be before --from")
+
+    locs = resolve_locations([n.strip() for n in args.locations.split(",") if n.strip()])
+    plan = plan_weeks(locs, args.start, args.end)
+
+    checkpoint = Checkpoint(args.checkpoint)
+    if args.restart:
+        checkpoint.done.clear()
+    pending = [key for key in plan if not checkpoint.covers(key, args.start, args.end)]
+    print(f"{len(plan)} week requests planned, {len(plan) - len(pending)} already done.")
+
+    nutrislice_client.RATE_LIMITER = nutrislice_client.TokenBucket(args.rate, args.burst)
+
+    def run(key: WeekKey) -> int:
+        school, menu_type, week = key
+        data = nutrislice_client.get_json(
+            nutrislice_client.week_url(school, menu_type, week),
+            parse=nutrislice_parse.parse_week,
+        )
+        added = archive_week(key, data, locs, args.start, args.end)
+        checkpoint.mark_done(key, args.start, args.end)
+        return added
+
+    start = time.perf_counter()
+    failed: List[str] = []
+    added = 0
+    pool = ThreadPoolExecutor(max_workers=max(1, args.workers))
+    try:
+        futures = {pool.submit(run, key): key for key in pending}
+        for i, fut in enumerate(as_completed(futures), 1):
+            key = futures[fut]
+            try:
+                added += fut.result()
+            except Exception as e:
+                failed.append(key_str(key))
+                print(f"[{key_str(key)}] failed: {e}")
+            if i % 10 == 0 or i == len(pending):
+                print(f"{i}/{len(pending)} weeks, {added} servings archived")
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume.")
+        pool.shutdown(wait=True, cancel_futures=True)
+        return 130
+    pool.shutdown()
+
+    print(f"Backfill finished in {time.perf_counter() - start:.2f}s ({len(failed)} weeks failed)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
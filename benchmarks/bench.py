@@ -0,0 +1,257 @@
+"""Offline scraper benchmarks.
+
+    python benchmarks/bench.py                    # run at 1x and 10x and compare with baseline.json
+    python benchmarks/bench.py --factors 1,10,100  # add the 100x stress run (about a minute, 1.3 GB RSS)
+    python benchmarks/bench.py --save-baseline    # run and store the results as the new baseline
+    python benchmarks/bench.py --record           # refresh benchmarks/fixtures/ from the live API
+    python benchmarks/bench.py --snapshot-published  # refresh fixtures/published_menus.json from the outputs
+
+Menus without a recorded fixture are built from the published snapshot,
+or failing that from a deterministic synthetic payload.
+"""
+import argparse
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+
+import archive  # noqa: E402
+import backfill  # noqa: E402
+import fixtures  # noqa: E402
+import locations  # noqa: E402
+import nutrislice_parse  # noqa: E402
+
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+
+# 100x 要跑一分钟左右、占 1.3 GB 内存，需要时用 --factors 1,10,100 打开
+DEFAULT_FACTORS = (1, 10)
+DEFAULT_REPEAT = 10
+# 解析放大后、端到端每档都至少跑这么多次，取最快的一次：单次计时会让回退判断随机翻转
+MIN_RUNS = 5
+
+# 比基线慢/大超过这个比例算回退；差值低于 NOISE_FLOOR 的忽略（计时抖动）
+DEFAULT_TOLERANCE = 0.25
+NOISE_FLOOR = {"ms": 1.0, "peak_kib": 64.0, "seconds": 0.05, "peak_rss_kib": 2048.0}
+
+# 端到端运行需要、但不是 scraper 生成的文件
+E2E_INPUTS = ("index.html", "east_side_retail.json")
+
+
+def location_raws(loc: Dict[str, Any], factor: int) -> Dict[fixtures.MenuKey, bytes]:
+    raws = {}
+    for s in locations.fetch_stations(loc["id"]):
+        key = (s["school"], s["menu_type"])
+        if key not in raws:
+            raw, _ = fixtures.load(*key)
+            raws[key] = fixtures.inflate(raw, factor)
+    return raws
+
+
+def parse_location(loc: Dict[str, Any], raws: Dict[fixtures.MenuKey, bytes]) -> int:
+    """Decode each station's week and build every day's output the way the location's scraper does."""
+    rows = 0
+    for station in locations.fetch_stations(loc["id"]):
+        data = nutrislice_parse.parse_week(raws[(station["school"], station["menu_type"])])
+        for day in data["days"]:
+            payload = backfill.day_payload(loc, station, day["date"], day.get("menu_items") or [])
+            rows += sum(1 for _ in archive.rows_from_output(payload))
+    return rows
+
+
+def bench_parse(factors: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for loc in locations.all_locations():
+        if not locations.fetch_stations(loc["id"]):
+            continue
+        for factor in factors:
+            raws = location_raws(loc, factor)
+            runs = max(MIN_RUNS, repeat // factor)
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                parse_location(loc, raws)
+                times.append((time.perf_counter() - start) * 1000)
+
+            tracemalloc.start()
+            parse_location(loc, raws)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[f"{loc['id']}@{factor}x"] = {
+                "ms": round(min(times), 3),
+                "peak_kib": round(peak / 1024, 1),
+            }
+    return results
+
+
+def bench_e2e(factor: int) -> Dict[str, float]:
+    """Fastest of MIN_RUNS e2e_run() calls."""
+    return min((e2e_run(factor) for _ in range(MIN_RUNS)), key=lambda r: r["seconds"])
+
+
+def e2e_run(factor: int) -> Dict[str, float]:
+    """Run scrape_all against the replay transport in a fresh process and scratch directory."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in E2E_INPUTS:
+            shutil.copy(os.path.join(ROOT, name), tmp)
+        env = dict(
+            os.environ,
+            WOLFIE_CACHE_DIR=os.path.join(tmp, ".cache"),
+            WOLFIE_ARCHIVE_ENABLED="0",
+            WOLFIE_HTTP_CACHE="0",
+        )
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--e2e-child", str(factor)],
+            cwd=tmp,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def peak_rss_kib() -> int:
+    """High-water RSS of this process.
+
+    Linux carries ru_maxrss over from the parent across fork+exec, so read
+    VmHWM (reset on exec) when /proc is available.
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def e2e_child(factor: int) -> None:
+    import contextlib
+    import io
+
+    import replay
+    import scrape_all
+
+    replay.install(factor)
+    sys.argv = ["scrape_all.py"]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        rc = scrape_all.main()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": round(elapsed, 3), "peak_rss_kib": peak_rss_kib(), "exit_code": rc}))
+
+
+def flatten(results: Dict[str, Any]) -> Dict[str, float]:
+    flat = {}
+    for group in ("parse", "e2e"):
+        for name, metrics in (results.get(group) or {}).items():
+            for metric, value in metrics.items():
+                if metric in NOISE_FLOOR:
+                    flat[f"{group}/{name}/{metric}"] = value
+    return flat
+
+
+def regressions(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    new, old = flatten(results), flatten(baseline)
+    out = []
+    for key, value in new.items():
+        base = old.get(key)
+        if base is None:
+            continue
+        floor = NOISE_FLOOR[key.rsplit("/", 1)[1]]
+        if value > base * (1 + tolerance) and value - base > floor:
+            out.append(f"{key}: {value:g} vs baseline {base:g} (+{(value / base - 1) * 100:.0f}%)")
+    return out
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def fixture_sources() -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for key in fixtures.menus():
+        _, source = fixtures.load(*key)
+        counts[source] = counts.get(source, 0) + 1
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against recorded or synthetic menus.")
+    parser.add_argument("--factors", default=",".join(map(str, DEFAULT_FACTORS)), help="Menu inflation factors.")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timed runs at 1x (fewer when inflated, never below MIN_RUNS); the fastest is kept.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--skip-e2e", action="store_true", help="Only time parsing.")
+    parser.add_argument("--record", action="store_true", help="Record fixtures from the live API and exit.")
+    parser.add_argument(
+        "--snapshot-published",
+        action="store_true",
+        help="Snapshot the menus in the repo's output files into fixtures and exit.",
+    )
+    parser.add_argument("--e2e-child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.e2e_child is not None:
+        e2e_child(args.e2e_child)
+        return 0
+    if args.record:
+        print(f"Recorded {fixtures.record(datetime.date.today())} menus into {fixtures.FIXTURE_DIR}")
+        return 0
+    if args.snapshot_published:
+        print(f"Saved {fixtures.save_published()} menus to {fixtures.PUBLISHED_FILE}")
+        return 0
+
+    factors = [int(f) for f in args.factors.split(",") if f.strip()]
+    results: Dict[str, Any] = {"python": sys.version.split()[0], "fixtures": fixture_sources()}
+    if not args.skip_e2e:
+        results["e2e"] = {f"{factor}x": bench_e2e(factor) for factor in factors}
+    results["parse"] = bench_parse(factors, args.repeat)
+
+    baseline = load_baseline(args.baseline)
+    old = flatten(baseline) if baseline else {}
+    print(f"{'metric':<44}{'value':>12}{'baseline':>12}")
+    for key, value in flatten(results).items():
+        base = old.get(key)
+        print(f"{key:<44}{value:>12g}{'' if base is None else format(base, 'g'):>12}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("No baseline yet; run with --save-baseline to store one.")
+        return 0
+    if baseline.get("fixtures") != results["fixtures"]:
+        print(f"Note: baseline used fixtures {baseline.get('fixtures')}, this run {results['fixtures']}")
+    found = regressions(results, baseline, args.tolerance)
+    for line in found:
+        print(f"REGRESSION {line}")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,306 @@
+import datetime
+import json
+import os
+import random
+import re
+import threading
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import locations
+import nutrislice_client
+import week_store
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# 仓库里已发布的菜单（各地点的输出 JSON）里真实的档口名和菜名，按菜单存的快照。
+# 没有录制文件的菜单用它展开成一周的 payload，名字长度和分区都比纯合成的接近真实数据
+PUBLISHED_FILE = os.path.join(FIXTURE_DIR, "published_menus.json")
+
+# 合成数据固定用这一周，保证每次生成的内容完全一样
+SYNTHETIC_WEEK = datetime.date(2026, 1, 25)
+
+# 食堂的餐段靠档口名里的 breakfast/lunch/dinner/late night 区分，零售档口用普通分类名
+_SECTIONS = [
+    "Hot Breakfast",
+    "Grill Breakfast",
+    "Chef's Table Lunch Specials",
+    "Grill Lunch Specials",
+    "Grill Dinner Specials",
+    "Late Night Specials",
+    "Rooted",
+    "Pasta",
+    "Pizza",
+    "Entrees",
+    "Sides",
+    "Beverages",
+]
+_FOODS = ["Burger", "Fries", "Salad", "Pizza", "Pasta", "Soup", "Wrap", "Tacos", "Curry", "Rice Bowl", "Omelet"]
+_NUTRIENTS = [
+    "calories", "g_fat", "g_saturated_fat", "g_trans_fat", "mg_cholesterol", "g_carbs", "g_added_sugar",
+    "g_sugar", "mg_sodium", "g_fiber", "g_protein", "mg_iron", "mg_calcium", "mg_vitamin_c", "iu_vitamin_a",
+]
+
+MenuKey = Tuple[str, str]
+
+_ID_KEY = re.compile(r"(^|_)id$")
+
+_WEEK_PATH = re.compile(r"/school/([^/]+)/menu-type/([^/]+)/(\d{4})/(\d{2})/(\d{2})/")
+
+
+def menus() -> List[MenuKey]:
+    """Every distinct (school, menu_type) the registry fetches."""
+    keys = (
+        (s["school"], s["menu_type"])
+        for loc in locations.all_locations()
+        for s in locations.fetch_stations(loc["id"])
+    )
+    return list(dict.fromkeys(keys))
+
+
+def fixture_path(school: str, menu_type: str) -> str:
+    return os.path.join(FIXTURE_DIR, f"{school}__{menu_type}.json")
+
+
+def anonymize(raw: bytes) -> bytes:
+    """Renumber every id / *_id field and point every URL at example.invalid."""
+    ids: Dict[Any, int] = {}
+
+    def walk(v: Any, key: str = "") -> Any:
+        if isinstance(v, dict):
+            return {k: walk(x, k) for k, x in v.items()}
+        if isinstance(v, list):
+            return [walk(x) for x in v]
+        if isinstance(v, int) and not isinstance(v, bool) and _ID_KEY.search(key):
+            return ids.setdefault((key, v), len(ids) + 1)
+        if isinstance(v, str) and v.startswith(("http://", "https://")):
+            return "https://example.invalid/"
+        return v
+
+    return json.dumps(walk(json.loads(raw))).encode("utf-8")
+
+
+def record(today: datetime.date) -> int:
+    """Save the live API's weekly payload for every menu, anonymized; returns how many were written."""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    seen = set()
+    for school, menu_type, d in locations.fetch_plan(today):
+        if (school, menu_type) in seen:
+            continue
+        seen.add((school, menu_type))
+        r = nutrislice_client.get(nutrislice_client.week_url(school, menu_type, d))
+        body = anonymize(r.content)
+        with open(fixture_path(school, menu_type), "wb") as f:
+            f.write(body)
+        print(f"Recorded {school}/{menu_type} ({len(body) / 1024:.0f} KiB)")
+    return len(seen)
+
+
+def _add_names(sections: Dict[str, List[str]], section: Any, items: Any) -> None:
+    if not isinstance(section, str) or not isinstance(items, list):
+        return
+    names = sections.setdefault(section, [])
+    names.extend(i for i in items if isinstance(i, str) and i.strip() and i not in names)
+
+
+def published_menus() -> Dict[str, Any]:
+    """{"school/menu_type": {"date", "sections": {section: foods}}} from the location outputs in the repo."""
+    out: Dict[str, Any] = {}
+    for loc in locations.all_locations():
+        stations = locations.fetch_stations(loc["id"])
+        try:
+            with open(os.path.join(ROOT, loc["file"]), "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for station in stations:
+            sections: Dict[str, List[str]] = {}
+            date = payload.get("date") or payload.get("date_fetched_from")
+            if loc["layout"] == "dining-hall":
+                for blocks in (payload.get("meals") or {}).values():
+                    for block in blocks or []:
+                        _add_names(sections, block.get("section"), block.get("items"))
+            else:
+                for sec in payload.get("sections") or []:
+                    if sec.get("type") == "chain" or sec.get("status", "ok") != "ok":
+                        continue
+                    if loc["layout"] == "single" or sec.get("section") == station["section"]:
+                        _add_names(sections, sec.get("section"), sec.get("items"))
+                        date = sec.get("date") or date
+            sections = {k: v for k, v in sections.items() if v}
+            if sections and date:
+                out.setdefault(f"{station['school']}/{station['menu_type']}", {"date": date, "sections": sections})
+    return dict(sorted(out.items()))
+
+
+def save_published() -> int:
+    """Snapshot published_menus() into PUBLISHED_FILE; returns how many menus it holds."""
+    snapshot = published_menus()
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(PUBLISHED_FILE, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=1, ensure_ascii=False)
+        f.write("\n")
+    return len(snapshot)
+
+
+def _food(rng: random.Random, i: int) -> Dict[str, Any]:
+    name = f"{rng.choice(_FOODS)} {i}"
+    return {
+        "id": rng.randint(1, 10**7),
+        "name": name,
+        "description": f"{name} served with seasonal sides",
+        "ingredients": ", ".join(rng.sample(_FOODS, 4)),
+        "rounded_nutrition_info": {k: round(rng.uniform(0, 500), 1) for k in _NUTRIENTS},
+        "serving_size_info": {"serving_size_amount": "1", "serving_size_unit": "each"},
+        "icons": {"food_icons": [{"id": rng.randint(1, 30), "slug": "vegan", "synced_name": "Vegan"}]},
+        "image_url": f"https://example.invalid/images/{rng.randint(1, 10**6)}.jpg",
+        "price": None,
+    }
+
+
+def from_published(school: str, menu_type: str, menu: Dict[str, Any]) -> bytes:
+    """A Nutrislice-shaped week serving a published day's real sections and foods every day.
+
+    The fields the walker ignores (nutrition, icons, images) are synthetic.
+    """
+    rng = random.Random(zlib.crc32(f"{school}/{menu_type}".encode("utf-8")))
+    start = week_store.week_start(datetime.date.fromisoformat(menu["date"]))
+    days = []
+    for i in range(7):
+        items: List[Dict[str, Any]] = []
+        for section, names in menu["sections"].items():
+            items.append({"text": section, "is_section_title": True, "is_station_header": False, "food": None})
+            for name in names:
+                food = _food(rng, len(items))
+                food.update(name=name, description=f"{name} served with seasonal sides")
+                items.append({
+                    "menu_id": rng.randint(1, 10**7),
+                    "text": "",
+                    "is_section_title": False,
+                    "is_station_header": False,
+                    "menu_category": {"name": section},
+                    "food": food,
+                })
+        days.append({
+            "date": (start + datetime.timedelta(days=i)).isoformat(),
+            "has_unpublished_menus": False,
+            "menu_items": items,
+        })
+    return json.dumps({"start_date": start.isoformat(), "days": days}).encode("utf-8")
+
+
+def synthesize(school: str, menu_type: str, week: datetime.date = SYNTHETIC_WEEK) -> bytes:
+    """A deterministic, Nutrislice-shaped weekly payload for menus that have no recording."""
+    rng = random.Random(zlib.crc32(f"{school}/{menu_type}".encode("utf-8")))
+    start = week_store.week_start(week)
+    days = []
+    for i in range(7):
+        items: List[Dict[str, Any]] = []
+        for section in rng.sample(_SECTIONS, rng.randint(4, 8)):
+            items.append({"text": section, "is_section_title": True, "is_station_header": False, "food": None})
+            for _ in range(rng.randint(5, 15)):
+                items.append({
+                    "menu_id": rng.randint(1, 10**7),
+                    "text": "",
+                    "is_section_title": False,
+                    "is_station_header": False,
+                    "menu_category": {"name": section} if rng.random() < 0.5 else None,
+                    "food": _food(rng, len(items)),
+                })
+        days.append({
+            "date": (start + datetime.timedelta(days=i)).isoformat(),
+            "has_unpublished_menus": False,
+            "menu_items": items,
+        })
+    return json.dumps({"start_date": start.isoformat(), "days": days}).encode("utf-8")
+
+
+_published: Optional[Dict[str, Any]] = None
+
+
+def _published_menu(school: str, menu_type: str) -> Optional[Dict[str, Any]]:
+    global _published
+    if _published is None:
+        try:
+            with open(PUBLISHED_FILE, "r", encoding="utf-8") as f:
+                _published = json.load(f)
+        except (OSError, ValueError):
+            _published = {}
+    return _published.get(f"{school}/{menu_type}")
+
+
+def load(school: str, menu_type: str) -> Tuple[bytes, str]:
+    """(raw payload, "recorded", "published" or "synthetic"), in that order of preference."""
+    try:
+        with open(fixture_path(school, menu_type), "rb") as f:
+            return f.read(), "recorded"
+    except FileNotFoundError:
+        pass
+    menu = _published_menu(school, menu_type)
+    if menu is not None:
+        return from_published(school, menu_type, menu), "published"
+    return synthesize(school, menu_type), "synthetic"
+
+
+def redate(raw: bytes, d: datetime.date) -> bytes:
+    """Move a weekly payload onto the week containing d, keeping each day's weekday."""
+    data = json.loads(raw)
+    start = week_store.week_start(d)
+    for day in data.get("days") or []:
+        try:
+            old = datetime.date.fromisoformat(day["date"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        day["date"] = (start + datetime.timedelta(days=(old.weekday() + 1) % 7)).isoformat()
+    return json.dumps(data).encode("utf-8")
+
+
+def parse_week_path(path: str) -> Optional[Tuple[str, str, datetime.date]]:
+    """(school, menu_type, date) of a weeks API path, or None for anything else."""
+    m = _WEEK_PATH.search(path)
+    if m is None:
+        return None
+    school, menu_type, y, mo, d = m.groups()
+    try:
+        return school, menu_type, datetime.date(int(y), int(mo), int(d))
+    except ValueError:
+        return None
+
+
+class WeekBodies:
+    """Fixture bodies moved onto the requested week and inflated by factor, built once per week."""
+
+    def __init__(self, factor: int = 1):
+        self.factor = factor
+        self._bodies: Dict[Tuple[str, str, datetime.date], bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, school: str, menu_type: str, d: datetime.date) -> bytes:
+        key = (school, menu_type, week_store.week_start(d))
+        with self._lock:
+            body = self._bodies.get(key)
+        if body is None:
+            raw, _ = load(school, menu_type)
+            body = inflate(redate(raw, d), self.factor)
+            with self._lock:
+                self._bodies[key] = body
+        return body
+
+
+def inflate(raw: bytes, factor: int) -> bytes:
+    """Repeat every day's menu_items factor times, renaming the copies so they survive dedupe."""
+    if factor <= 1:
+        return raw
+    data = json.loads(raw)
+    for day in data.get("days") or []:
+        items = day.get("menu_items") or []
+        copies = list(items)
+        for k in range(1, factor):
+            for mi in items:
+                food = mi.get("food") if isinstance(mi, dict) else None
+                if isinstance(food, dict) and isinstance(food.get("name"), str):
+                    mi = dict(mi, food=dict(food, name=f"{food['name']} ({k})"))
+                copies.append(mi)
+        day["menu_items"] = copies
+    return json.dumps(data).encode("utf-8")
@@ -0,0 +1,179 @@
+"""Local stand-in for the Nutrislice weeks API, serving benchmarks/fixtures.
+
+    python benchmarks/mock_nutrislice.py --port 8765 --latency-ms 80 --jitter-ms 40 \\
+        --error-rate 0.02 --throttle-rate 0.05 --size 10
+    NUTRISLICE_BASE_URL=http://127.0.0.1:8765 python scrape_all.py
+
+GET /_stats returns request counts by status so far.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures  # noqa: E402
+
+
+class MockConfig:
+    """How the mock misbehaves.
+
+    latency_ms:     fixed delay before every response
+    jitter_ms:      mean of an extra exponential delay (gives a long tail)
+    error_rate:     fraction of requests answered with 503
+    throttle_rate:  fraction answered with 429 and Retry-After: retry_after
+    size:           inflation factor for every day's menu_items
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        size: int = 1,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.size = size
+        self.seed = seed
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: MockConfig, verbose: bool = False):
+        super().__init__(address, _Handler)
+        self.config = config
+        self.verbose = verbose
+        self.bodies = fixtures.WeekBodies(config.size)
+        self.stats: Dict[str, int] = {}
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def roll(self):
+        """(delay in seconds, random draw for the status decision)."""
+        cfg = self.config
+        with self._lock:
+            jitter = self._rng.expovariate(1 / cfg.jitter_ms) if cfg.jitter_ms > 0 else 0.0
+            return (cfg.latency_ms + jitter) / 1000, self._rng.random()
+
+    def count(self, status: int) -> None:
+        with self._lock:
+            self.stats[str(status)] = self.stats.get(str(status), 0) + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # keep-alive，和生产环境一样复用连接
+    protocol_version = "HTTP/1.1"
+    server: MockServer
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None) -> None:
+        self.server.count(status)
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/_stats":
+            with self.server._lock:
+                body = json.dumps(self.server.stats).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        cfg = self.server.config
+        delay, draw = self.server.roll()
+        if delay > 0:
+            time.sleep(delay)
+
+        week = fixtures.parse_week_path(path)
+        if week is None:
+            self._send(404)
+        elif draw < cfg.throttle_rate:
+            self._send(429, headers={"Retry-After": f"{cfg.retry_after:g}"})
+        elif draw < cfg.throttle_rate + cfg.error_rate:
+            self._send(503)
+        else:
+            body = self.server.bodies.get(*week)
+            etag = f'"{zlib.crc32(body):08x}-{len(body)}"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, headers={"ETag": etag})
+            else:
+                self._send(200, body, {"Content-Type": "application/json", "ETag": etag})
+
+
+def start(config: MockConfig, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    """Serve in a background thread; stop with server.shutdown()."""
+    server = MockServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Serve fixture menus in the Nutrislice weeks API shape.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503 responses.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429 responses.")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--size", type=int, default=1, help="Menu inflation factor (payload size).")
+    parser.add_argument("--seed", type=int, help="Seed for latency and error draws.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every request.")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        size=args.size,
+        seed=args.seed,
+    )
+    server = MockServer((args.host, args.port), config, verbose=args.verbose)
+    print(f"Serving mock Nutrislice on {server.base_url}")
+    print(f"  NUTRISLICE_BASE_URL={server.base_url} python scrape_all.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,57 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+import async_fetch
+import fixtures
+import nutrislice_client
+
+
+class ReplayAdapter(BaseAdapter):
+    """requests transport that answers Nutrislice week URLs from fixtures.
+
+    Each fixture is moved onto the requested week and inflated by factor;
+    unknown URLs get a 404.
+    """
+
+    def __init__(self, factor: int = 1):
+        super().__init__()
+        self.bodies = fixtures.WeekBodies(factor)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs) -> requests.Response:
+        with self._lock:
+            self.requests += 1
+        resp = requests.Response()
+        resp.request = request
+        resp.url = request.url
+        resp.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+
+        week = fixtures.parse_week_path(urlsplit(request.url).path)
+        if week is None:
+            resp.status_code = 404
+            resp._content = b""
+            return resp
+        resp.status_code = 200
+        resp._content = self.bodies.get(*week)
+        return resp
+
+    def close(self) -> None:
+        pass
+
+
+def install(factor: int = 1) -> ReplayAdapter:
+    """Route every Nutrislice API request of this process through a ReplayAdapter.
+
+    The async layer is switched to its thread fallback so it shares the
+    patched requests session, and the on-disk HTTP cache is turned off.
+    """
+    adapter = ReplayAdapter(factor)
+    nutrislice_client.get_session().mount(nutrislice_client.API_BASE, adapter)
+    nutrislice_client.CACHE = None
+    async_fetch.httpx = None
+    return adapter
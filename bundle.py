@@ -0,0 +1,39 @@
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+import locations
+
+BUNDLE_FILE = "menus.bundle.json"
+
+HASH_LENGTH = 16
+
+
+def dumps(obj: Any) -> str:
+    # 不缩进、不加空格：这是给前端下载的文件，不是给人读的
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+
+def load_output(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Bundle: skipping {path}: {e}")
+        return None
+
+
+def build_bundle(files: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Manifest plus every location's scraped output, keyed by location id.
+
+    "hash" covers everything else in the bundle, so the frontend can tell
+    whether anything changed without comparing the payloads.
+    """
+    manifest = locations.build_manifest(files)
+    data = {loc["id"]: load_output(loc["file"]) for loc in manifest["locations"]}
+    body = {**manifest, "data": data}
+    return {"hash": content_hash(dumps(body)), **body}
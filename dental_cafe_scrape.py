@@ -1,99 +1,31 @@
-import json
 import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List
 
-import requests
+import locations
+import nutrislice_client
+import nutrislice_parse
+import profiling
+import publish
+import week_store
 
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (SBU Student Project)",
-    "Accept": "application/json",
-}
-
-API_TEMPLATE = (
-    "https://stonybrook.api.nutrislice.com/menu/api/weeks/school/sbu-eats-events/"
-    "menu-type/dental-cafe/{year}/{month}/{day}/?format=json"
-)
+LOCATION = locations.get_location("dental-cafe")
+SCHOOL_SLUG = LOCATION["stations"][0]["school"]
+MENU_TYPE = LOCATION["stations"][0]["menu_type"]
 
+SECTION_RULES = nutrislice_parse.FLAGGED_HEADERS
 
 def eastern_now() -> datetime.datetime:
     return datetime.datetime.utcnow() - datetime.timedelta(hours=5)
 
 
-def safe_food_name(mi: Dict[str, Any]) -> Optional[str]:
-    food = mi.get("food") or {}
-    if isinstance(food, dict):
-        name = food.get("name")
-        if isinstance(name, str) and name.strip():
-            return name.strip()
-    return None
-
-
-def is_header_item(mi: Dict[str, Any]) -> bool:
-    if mi.get("food"):
-        return False
-    return bool(mi.get("is_section_title") or mi.get("is_station_header"))
-
-
-def header_text(mi: Dict[str, Any]) -> Optional[str]:
-    for k in ("text", "name", "label", "description", "menu_item_name"):
-        v = mi.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip()
-    return None
-
-
-def pick_section_name(mi: Dict[str, Any], current_section: Optional[str]) -> str:
-    mc = mi.get("menu_category")
-    cat = mi.get("category")
-
-    mc_name = mc.get("name") if isinstance(mc, dict) else None
-    cat_name = cat.get("name") if isinstance(cat, dict) else None
-
-    sec = (
-        mc_name
-        or cat_name
-        or mi.get("category_name")
-        or mi.get("station")
-        or "Other"
-    )
-
-    if (not sec or sec == "Other") and current_section:
-        sec = current_section
-
-    if not isinstance(sec, str) or not sec.strip():
-        return current_section or "Other"
-
-    return sec.strip()
-
-
-def dedupe_preserve_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        if x not in seen:
-            seen.add(x)
-            out.append(x)
-    return out
-
-
 def fetch_daily_menu(date_obj: datetime.date) -> Dict[str, Any]:
-    url = API_TEMPLATE.format(
-        year=date_obj.year,
-        month=f"{date_obj.month:02d}",
-        day=f"{date_obj.day:02d}",
-    )
+    url = nutrislice_client.week_url(SCHOOL_SLUG, MENU_TYPE, date_obj)
     date_str = date_obj.strftime("%Y-%m-%d")
 
     try:
-        r = requests.get(url, headers=HEADERS, timeout=25)
-        r.raise_for_status()
-        data = r.json()
+        data = week_store.get_week(SCHOOL_SLUG, MENU_TYPE, date_obj, url)
 
-        day_block = None
-        for d in data.get("days", []):
-            if d.get("date") == date_str:
-                day_block = d
-                break
+        day_block = nutrislice_parse.find_day(data, date_str)
 
         if not day_block:
             return {
@@ -112,44 +44,22 @@ def fetch_daily_menu(date_obj: datetime.date) -> Dict[str, Any]:
                 "sections": [],
             }
 
-        if (
-            len(menu_items) == 1
-            and isinstance(menu_items[0], dict)
-            and menu_items[0].get("is_holiday")
-            and isinstance(menu_items[0].get("text"), str)
-        ):
+        closed = nutrislice_parse.closed_message(menu_items)
+        if closed is not None:
             return {
                 "status": "closed",
-                "message": menu_items[0].get("text").strip(),
+                "message": closed,
                 "source_url": url,
                 "sections": [],
             }
 
-        section_map: Dict[str, List[str]] = {}
-        current_section: Optional[str] = None
-
-        for mi in menu_items:
-            if not isinstance(mi, dict):
-                continue
-
-            if is_header_item(mi):
-                ht = header_text(mi)
-                if ht:
-                    current_section = ht
-                continue
-
-            name = safe_food_name(mi)
-            if not name:
-                continue
+        section_map = nutrislice_parse.walk_sections(menu_items, SECTION_RULES)
 
-            sec = pick_section_name(mi, current_section)
-            section_map.setdefault(sec, []).append(name)
-
-        sections_out: List[Dict[str, Any]] = []
-        for sec_name, items in section_map.items():
-            items2 = dedupe_preserve_order(items)
-            if items2:
-                sections_out.append({"section": sec_name, "items": items2})
+        sections_out: List[Dict[str, Any]] = [
+            {"section": sec_name, "items": items}
+            for sec_name, items in section_map.items()
+            if items
+        ]
 
         if not sections_out:
             return {
@@ -166,6 +76,13 @@ def fetch_daily_menu(date_obj: datetime.date) -> Dict[str, Any]:
             "sections": sections_out,
         }
 
+    except nutrislice_client.DeadlineExceeded as e:
+        return {
+            "status": "stale",
+            "message": f"Error: {e}",
+            "source_url": url,
+            "sections": [],
+        }
     except Exception as e:
         return {
             "status": "fetch_error",
@@ -190,14 +107,15 @@ def main() -> None:
         "message": fetched["message"],
         "source_url": fetched["source_url"],
         "sections": fetched["sections"],
-        "menu_url": f"https://stonybrook.nutrislice.com/menu/sbu-eats-events/dental-cafe/{today.strftime('%Y-%m-%d')}",
+        "menu_url": nutrislice_client.menu_url(SCHOOL_SLUG, MENU_TYPE, today),
     }
+    if out["status"] == "stale":
+        out = publish.stale_output(LOCATION["file"], out)
 
-    with open("dental_cafe.json", "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2, ensure_ascii=False)
+    publish.write_output(LOCATION["file"], out)
 
-    print("Successfully wrote dental_cafe.json")
+    print(f"Successfully wrote {LOCATION['file']}")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.cli("dental-cafe", main)
@@ -1,16 +1,18 @@
-import requests
-import json
 import datetime
 import re
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
+import locations
+import nutrislice_client
+import nutrislice_parse
+import profiling
+import publish
+import week_store
 
-TARGET_URL_TEMPLATE = (
-    "https://stonybrook.api.nutrislice.com/menu/api/weeks/school/east-side-dining/menu-type/"
-    "todays-dine-in-specials-esd/{year}/{month}/{day}/?format=json"
-)
 
-HEADERS = {"User-Agent": "Mozilla/5.0 (SBU Student Project)"}
+LOCATION = locations.get_location("east-hall")
+SCHOOL_SLUG = LOCATION["stations"][0]["school"]
+MENU_TYPE = LOCATION["stations"][0]["menu_type"]
 
 MEAL_KEYWORDS = [
     ("late_night", re.compile(r"\blate\s*night\b", re.I)),
@@ -26,6 +28,8 @@ PASTA_SECTION_RE = re.compile(r"\bpasta\b", re.I)
 LATE_NIGHT_SOURCE_SECTION = "Late Night Specials"
 LATE_NIGHT_TARGET_SECTION = "Grill Dinner Specials"
 
+SECTION_RULES = nutrislice_parse.IMPLICIT_HEADERS
+
 
 
 def _ny_tz():
@@ -43,41 +47,6 @@ NY_TZ = _ny_tz()
 def ny_now() -> datetime.datetime:
     return datetime.datetime.now(NY_TZ)
 
-def pick_section_name(menu_item: dict) -> str:
-    """尝试从多个字段中提取档口/区域名称"""
-    mc = menu_item.get("menu_category") or {}
-    cat = menu_item.get("category") or {}
-    return (
-        mc.get("name")
-        or cat.get("name")
-        or menu_item.get("category_name")
-        or menu_item.get("station")
-        or "Other"
-    )
-
-def safe_food_name(mi: dict) -> str | None:
-    food = mi.get("food") or {}
-    name = food.get("name")
-    if isinstance(name, str) and name.strip():
-        return name.strip()
-    return None
-
-def detect_header_text(mi: dict) -> str | None:
-    """检测是否是纯文本标题而非菜品"""
-    if mi.get("food"):
-        return None
-
-    for k in ("name", "text", "label", "description", "menu_item_name"):
-        v = mi.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip()
-
-    title = (mi.get("category") or {}).get("name")
-    if isinstance(title, str) and title.strip():
-        return title.strip()
-
-    return None
-
 def guess_meal_from_section(section_name: str) -> str:
     """根据档口名猜测属于哪个餐段 (e.g. 'Grill Lunch' -> lunch)"""
     for meal, pat in MEAL_KEYWORDS:
@@ -89,19 +58,8 @@ def is_pizza_or_pasta_section(section_name: str) -> bool:
     s = section_name or ""
     return bool(PIZZA_SECTION_RE.search(s) or PASTA_SECTION_RE.search(s))
 
-def add_name(meals_map: dict, meal: str, section: str, food_name: str):
-    meals_map.setdefault(meal, {})
-    meals_map[meal].setdefault(section, [])
-    meals_map[meal][section].append(food_name)
-
-def dedupe_preserve_order(names: list[str]) -> list[str]:
-    seen = set()
-    out = []
-    for n in names:
-        if n not in seen:
-            seen.add(n)
-            out.append(n)
-    return out
+def add_names(meals_map: dict, meal: str, section: str, food_names: list[str]):
+    meals_map.setdefault(meal, {}).setdefault(section, []).extend(food_names)
 
 def meals_map_to_output(meals_map: dict, meal_order: list[str]) -> dict:
     out = {}
@@ -109,7 +67,7 @@ def meals_map_to_output(meals_map: dict, meal_order: list[str]) -> dict:
         sections = meals_map.get(meal, {})
         blocks = []
         for sec, names in sections.items():
-            blocks.append({"section": sec, "items": dedupe_preserve_order(names)})
+            blocks.append({"section": sec, "items": nutrislice_parse.dedupe_preserve_order(names)})
         blocks.sort(key=lambda x: (x["section"] or "").lower())
         out[meal] = blocks
     return out
@@ -121,7 +79,7 @@ def merge_blocks(blocks: list[dict]) -> list[dict]:
         s = b.get("section") or "Other"
         sec_map.setdefault(s, []).extend(b.get("items") or [])
     
-    merged = [{"section": s, "items": dedupe_preserve_order(items)} for s, items in sec_map.items()]
+    merged = [{"section": s, "items": nutrislice_parse.dedupe_preserve_order(items)} for s, items in sec_map.items()]
     merged.sort(key=lambda x: (x["section"] or "").lower())
     return merged
 
@@ -156,86 +114,74 @@ def weekend_merge_brunch_dinner(base: dict) -> dict:
 
 
 
+def categorize_meals(todays_items: list, is_weekend: bool) -> dict:
+    """One day's menu_items -> {meal: [{"section", "items"}]} as written to the output file."""
+    meals_map = {}
+    section_map = nutrislice_parse.walk_sections(todays_items, SECTION_RULES)
+
+    for section, food_names in section_map.items():
+        if is_pizza_or_pasta_section(section):
+            if is_weekend:
+                meals = ("brunch", "dinner")
+            else:
+                meals = ("lunch", "dinner", "late_night")
+        else:
+            meals = (guess_meal_from_section(section),)
+
+        for meal in meals:
+            add_names(meals_map, meal, section, food_names)
+
+    if is_weekend:
+        base = meals_map_to_output(meals_map, ["breakfast", "lunch", "dinner", "late_night", "brunch"])
+        return weekend_merge_brunch_dinner(base)
+    return meals_map_to_output(meals_map, ["breakfast", "lunch", "dinner", "late_night"])
+
+
 def fetch_east_dining_menu():
     now = ny_now()
     date_str = now.strftime("%Y-%m-%d")
     is_weekend = now.weekday() >= 5  # Saturday=5, Sunday=6
 
-    url = TARGET_URL_TEMPLATE.format(
-        year=now.year,
-        month=f"{now.month:02d}",
-        day=f"{now.day:02d}",
-    )
+    url = nutrislice_client.week_url(SCHOOL_SLUG, MENU_TYPE, now.date())
     print(f"Fetching from: {url}")
 
     status = "ok"
     message = ""
-    meals_map = {}
+    todays_items = []
     found_today = False
 
     try:
-        response = requests.get(url, headers=HEADERS, timeout=25)
-        response.raise_for_status()
-        data = response.json()
+        data = week_store.get_week(SCHOOL_SLUG, MENU_TYPE, now.date(), url)
 
-        todays_items = []
-        for day_data in data.get("days", []):
-            if day_data.get("date") == date_str:
-                found_today = True
-                todays_items = day_data.get("menu_items", [])
-                print(f"Found date {date_str} with {len(todays_items)} items.")
-                break
+        day_data = nutrislice_parse.find_day(data, date_str)
+        if day_data is not None:
+            found_today = True
+            todays_items = day_data.get("menu_items", [])
+            print(f"Found date {date_str} with {len(todays_items)} items.")
 
         if not found_today or not todays_items:
             status = "no_data_today"
             message = f"API data does not contain {date_str} (or empty)."
             print(message)
         else:
-            current_section = None
-
-            for mi in todays_items:
-                header = detect_header_text(mi)
-                if header:
-                    current_section = header
-                    continue
-
-                food_name = safe_food_name(mi)
-                if not food_name:
-                    continue
-
-                section = pick_section_name(mi)
-                if section == "Other" and current_section:
-                    section = current_section
-
-                if is_pizza_or_pasta_section(section):
-                    if is_weekend:
-                        add_name(meals_map, "brunch", section, food_name)
-                        add_name(meals_map, "dinner", section, food_name)
-                    else:
-                        add_name(meals_map, "lunch", section, food_name)
-                        add_name(meals_map, "dinner", section, food_name)
-                        add_name(meals_map, "late_night", section, food_name)
-                    continue
-
-                meal = guess_meal_from_section(section)
-                add_name(meals_map, meal, section, food_name)
-
             status = "ok"
             message = "Menu fetched and categorized."
             print(message)
 
+    except nutrislice_client.DeadlineExceeded as e:
+        todays_items = []
+        status = "stale"
+        message = f"Error fetching menu: {e}"
+        print(message)
     except Exception as e:
+        todays_items = []
         status = "fetch_error"
         message = f"Error fetching menu: {e}"
         print(message)
         import traceback
         traceback.print_exc()
 
-    if is_weekend:
-        base = meals_map_to_output(meals_map, ["breakfast", "lunch", "dinner", "late_night", "brunch"])
-        meals_out = weekend_merge_brunch_dinner(base)
-    else:
-        meals_out = meals_map_to_output(meals_map, ["breakfast", "lunch", "dinner", "late_night"])
+    meals_out = categorize_meals(todays_items, is_weekend)
 
     output = {
         "date": date_str,
@@ -249,12 +195,12 @@ def fetch_east_dining_menu():
         "source_url": url,
     }
 
-    filename = "east_dining.json"
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    filename = LOCATION["file"]
+    if status == "stale":
+        output = publish.stale_output(filename, output)
+    publish.write_output(filename, output)
 
     print(f"Successfully updated {filename}!")
 
 if __name__ == "__main__":
-
-    fetch_east_dining_menu()
+    profiling.cli("east-hall", fetch_east_dining_menu)
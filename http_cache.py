@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from typing import Any, Dict, Optional
+
+CACHE_DIR = os.path.join(os.environ.get("WOLFIE_CACHE_DIR", ".cache"), "http")
+
+# 超过 TTL 未重新验证的条目直接删除；总大小超过上限时按最近访问时间淘汰
+TTL_SECONDS = 14 * 24 * 3600
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class HttpCache:
+    """On-disk response cache keyed by URL, revalidated with ETag / Last-Modified.
+
+    Each entry is a small JSON metadata file plus a pickle of the already
+    parsed payload, so a 304 hands back the previous result without decoding
+    the body again.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, ttl: float = TTL_SECONDS, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + ".meta.json", base + ".pickle"
+
+    def lookup(self, url: str, parser: str = "") -> Optional[Dict[str, Any]]:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url or meta.get("parser", "") != parser or not os.path.exists(body_path):
+            return None
+        if time.time() - meta.get("validated_at", 0) > self.ttl:
+            return None
+        return meta
+
+    def conditional_headers(self, meta: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if not meta:
+            return headers
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def load(self, url: str) -> Any:
+        _, body_path = self._paths(url)
+        with open(body_path, "rb") as f:
+            return pickle.load(f)
+
+    def revalidated(self, url: str, meta: Dict[str, Any]) -> None:
+        """Record a 304: the stored payload is current again."""
+        meta = dict(meta, validated_at=time.time())
+        meta_path, _ = self._paths(url)
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def store(self, url: str, headers, payload: Any, parser: str = "") -> None:
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        meta_path, body_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "parser": parser,
+            "validated_at": time.time(),
+        }
+        self._write(body_path, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        self._write(meta_path, json.dumps(meta).encode("utf-8"))
+        self.evict()
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def evict(self) -> None:
+        with self._lock:
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                return
+
+            now = time.time()
+            entries = []
+            total = 0
+            for name in names:
+                if not name.endswith(".meta.json"):
+                    continue
+                key = name[: -len(".meta.json")]
+                meta_path = os.path.join(self.directory, name)
+                body_path = os.path.join(self.directory, key + ".pickle")
+                try:
+                    st = os.stat(meta_path)
+                    size = st.st_size + os.path.getsize(body_path)
+                except OSError:
+                    self._remove(meta_path, body_path)
+                    continue
+                if now - st.st_mtime > self.ttl:
+                    self._remove(meta_path, body_path)
+                    continue
+                entries.append((st.st_mtime, size, meta_path, body_path))
+                total += size
+
+            entries.sort()
+            for _, size, meta_path, body_path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(meta_path, body_path)
+                total -= size
+
+    @staticmethod
+    def _remove(*paths: str) -> None:
+        for p in paths:
+            try:
+                os.remove(p)
+            except OSError:
+                pass
@@ -0,0 +1,226 @@
+import datetime
+import json
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "locations.json")
+
+MANIFEST_FILE = "manifest.json"
+
+DAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# 前端按 JS 的 getDay() 取当天：0 = 周日
+JS_WEEKDAYS = (6, 0, 1, 2, 3, 4, 5)
+
+_HOURS_SPLIT = re.compile(r"to|–|-")
+_HOURS_TIME = re.compile(r"(\d+):?(\d+)?([ap]m)")
+
+_registry: Optional[Dict[str, Any]] = None
+
+
+def load_registry() -> Dict[str, Any]:
+    global _registry
+    if _registry is None:
+        with open(REGISTRY_PATH, "r", encoding="utf-8") as f:
+            _registry = json.load(f)
+    return _registry
+
+
+def all_locations() -> List[Dict[str, Any]]:
+    return load_registry()["locations"]
+
+
+def get_location(loc_id: str) -> Dict[str, Any]:
+    for loc in all_locations():
+        if loc["id"] == loc_id:
+            return loc
+    raise KeyError(f"Unknown location: {loc_id}")
+
+
+def fixed_menu_date() -> datetime.date:
+    return datetime.date.fromisoformat(load_registry()["fixed_menu_date"])
+
+
+def fetch_stations(loc_id: str) -> List[Dict[str, Any]]:
+    """Stations of a location that are scraped from Nutrislice (have school + menu_type)."""
+    return [s for s in get_location(loc_id)["stations"] if s.get("school") and s.get("menu_type")]
+
+
+def station_date(station: Dict[str, Any], today: datetime.date) -> datetime.date:
+    return today if station.get("daily") else fixed_menu_date()
+
+
+def fetch_plan(
+    today: datetime.date, loc_ids: Optional[Iterable[str]] = None
+) -> List[Tuple[str, str, datetime.date]]:
+    """Every distinct (school, menu_type, date) the registry needs for one run."""
+    wanted = set(loc_ids) if loc_ids is not None else None
+    seen = set()
+    plan = []
+    for loc in all_locations():
+        if wanted is not None and loc["id"] not in wanted:
+            continue
+        for s in loc["stations"]:
+            if not (s.get("school") and s.get("menu_type")):
+                continue
+            key = (s["school"], s["menu_type"], station_date(s, today))
+            if key not in seen:
+                seen.add(key)
+                plan.append(key)
+    return plan
+
+
+def resolve_table(table: Optional[Dict[str, str]], d: datetime.date) -> str:
+    """Pick the hours string for date d from a table keyed by day / weekday / weekend."""
+    return _resolve_weekday(table, d.weekday())
+
+
+def _resolve_weekday(table: Optional[Dict[str, str]], wd: int) -> str:
+    if not table:
+        return "Hours vary"
+    for key in (DAY_KEYS[wd], "weekday" if wd < 5 else "weekend", "default"):
+        if key in table:
+            return table[key]
+    return "Hours vary"
+
+
+def station_matches(station: Dict[str, Any], name: str) -> bool:
+    match = station.get("match")
+    if match is None:
+        match = station["section"].lower()
+    return match in name.strip().lower()
+
+
+def station_hours(loc_id: str, station_name: str, d: datetime.date) -> str:
+    loc = get_location(loc_id)
+    tables = load_registry()["hours_tables"]
+    key = station_name.strip().lower()
+
+    exc = (loc.get("exceptions") or {}).get(d.isoformat())
+    if exc and "stations" in exc:
+        override = exc["stations"]
+        if isinstance(override, str):
+            return override
+        for k, v in override.items():
+            if k != "*" and k in key:
+                return v
+        return override.get("*", "Hours vary")
+
+    for s in loc["stations"]:
+        if station_matches(s, key):
+            return resolve_table(tables.get(s.get("hours")), d)
+    return "Hours vary"
+
+
+def hall_hours(loc_id: str, d: datetime.date) -> str:
+    loc = get_location(loc_id)
+    exc = (loc.get("exceptions") or {}).get(d.isoformat())
+    if exc and "hall" in exc:
+        return exc["hall"]
+    return resolve_table(load_registry()["hours_tables"].get(loc.get("hall_hours")), d)
+
+
+def _minutes(text: str, is_end: bool) -> int:
+    m = _HOURS_TIME.search(re.sub(r"[^a-z0-9:]", "", text.lower()))
+    if not m:
+        return 0
+    h = int(m.group(1))
+    minute = int(m.group(2)) if m.group(2) else 0
+    if m.group(3) == "pm" and h != 12:
+        h += 12
+    if m.group(3) == "am" and h == 12:
+        h = 0
+    total = h * 60 + minute
+    # "to 12am" 表示营业到午夜
+    if is_end and total == 0:
+        total = 1440
+    return total
+
+
+def parse_hours(text: Optional[str]) -> Optional[List[List[int]]]:
+    """"11am to 8pm" -> [[660, 1200]] in minutes since midnight.
+
+    "Closed" is an empty list; "Hours vary" (or anything without a range)
+    is None, which the frontend treats as open.
+    """
+    if not text or text == "Closed":
+        return []
+    parts = _HOURS_SPLIT.split(text)
+    if text == "Hours vary" or len(parts) < 2:
+        return None
+    start, end = _minutes(parts[0], False), _minutes(parts[1], True)
+    return [[start, end]] if start < end else []
+
+
+def hours_slot(text: str) -> Dict[str, Any]:
+    return {"label": text, "open": parse_hours(text)}
+
+
+def weekly_slots(table: Optional[Dict[str, str]]) -> List[Dict[str, Any]]:
+    """Seven slots indexed like JS Date.getDay() (0 = Sunday)."""
+    return [hours_slot(_resolve_weekday(table, wd)) for wd in JS_WEEKDAYS]
+
+
+def _exception_slots(exceptions: Dict[str, Any]) -> Dict[str, Any]:
+    out = {}
+    for date, exc in exceptions.items():
+        entry: Dict[str, Any] = {}
+        if "hall" in exc:
+            entry["hall"] = hours_slot(exc["hall"])
+        if "stations" in exc:
+            st = exc["stations"]
+            entry["stations"] = hours_slot(st) if isinstance(st, str) else {k: hours_slot(v) for k, v in st.items()}
+        out[date] = entry
+    return out
+
+
+def build_manifest(files: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Frontend view of the registry: display names, files, layouts and hours.
+
+    Hours are pre-parsed: "hours" maps each hours table to seven
+    {"label", "open"} slots (Sunday first) whose "open" is a list of
+    [start, end) minutes since midnight, and exceptions carry slots for
+    their dates. files maps location ids to their content-hashed output names.
+    """
+    reg = load_registry()
+    locations = []
+    for loc in reg["locations"]:
+        locations.append({
+            "id": loc["id"],
+            "name": loc["name"],
+            "file": loc["file"],
+            "layout": loc["layout"],
+            "hall_hours": loc.get("hall_hours"),
+            "exceptions": _exception_slots(loc.get("exceptions") or {}),
+            "stations": [
+                {
+                    k: s[k]
+                    for k in ("section", "match", "hours", "always_show", "items", "menu_url")
+                    if k in s
+                }
+                for s in loc["stations"]
+            ],
+        })
+    return {
+        "timezone": reg["timezone"],
+        "hours": {name: weekly_slots(table) for name, table in reg["hours_tables"].items()},
+        "locations": locations,
+        "files": files or {},
+    }
+
+
+def write_manifest(
+    path: str = MANIFEST_FILE,
+    files: Optional[Dict[str, str]] = None,
+    bundle_file: Optional[str] = None,
+    search_file: Optional[str] = None,
+) -> None:
+    manifest = build_manifest(files)
+    if bundle_file:
+        manifest["bundle"] = bundle_file
+    if search_file:
+        manifest["search"] = search_file
+    # 每次打开页面都要先取 manifest，写成紧凑格式（缩进版里大半是营业时间的空白）
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
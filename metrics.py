@@ -0,0 +1,258 @@
+"""Per-run events for the scrapers, written as JSON lines and Prometheus text."""
+import contextlib
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+RUN_REPORT_FILE = "run_report.jsonl"
+PROMETHEUS_FILE = "metrics.prom"
+
+# 设置 WOLFIE_METRICS=0 可关闭记录（例如长时间的 backfill）
+ENABLED = os.environ.get("WOLFIE_METRICS") != "0"
+
+_events: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+
+# 当前正在跑的地点；scrape_all 在每个 scraper 外面设置，事件自动带上
+_location: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("metrics_location", default=None)
+
+# 本线程正在计时的同步请求，供连接层回报 connect/TLS 耗时
+_local = threading.local()
+
+_MENU = re.compile(r"/school/([^/]+)/menu-type/([^/]+)/")
+
+
+def menu_label(url: str) -> str:
+    """"school/menu_type" for a Nutrislice API URL, else the URL itself."""
+    m = _MENU.search(url)
+    return f"{m.group(1)}/{m.group(2)}" if m else url
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def record(event: str, **fields: Any) -> None:
+    if not ENABLED:
+        return
+    entry: Dict[str, Any] = {"event": event, "ts": round(time.time(), 3)}
+    loc = _location.get()
+    if loc is not None and "location" not in fields:
+        entry["location"] = loc
+    entry.update(fields)
+    with _lock:
+        _events.append(entry)
+
+
+@contextlib.contextmanager
+def location(loc_id: str) -> Iterator[None]:
+    """Tag every event recorded inside the block (and tasks it starts) with loc_id."""
+    token = _location.set(loc_id)
+    try:
+        yield
+    finally:
+        _location.reset(token)
+
+
+@contextlib.contextmanager
+def timer(stage: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Record a "stage" event with the block's duration; fields added to the yielded dict are kept."""
+    extra = dict(fields)
+    start = time.perf_counter()
+    try:
+        yield extra
+    finally:
+        record("stage", stage=stage, ms=_ms(time.perf_counter() - start), **extra)
+
+
+class RequestTimer:
+    """Timings of one HTTP attempt.
+
+    connect covers DNS resolution and the TCP handshake and tls the TLS
+    handshake; both are absent when a pooled connection was reused. ttfb runs
+    from the start of the attempt to the response headers, less connect and
+    tls; download from the headers to the end of the body.
+    """
+
+    def __init__(self, url: str, attempt: int, transport: str):
+        self.url = url
+        self.attempt = attempt
+        self.transport = transport
+        self.start = time.perf_counter()
+        self.headers_at: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+
+    def phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def headers(self) -> None:
+        self.headers_at = time.perf_counter()
+
+    def done(
+        self,
+        status: Optional[int] = None,
+        nbytes: int = 0,
+        wire_bytes: Optional[int] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        end = time.perf_counter()
+        if getattr(_local, "request", None) is self:
+            _local.request = None
+
+        fields: Dict[str, Any] = {
+            "menu": menu_label(self.url),
+            "url": self.url,
+            "transport": self.transport,
+            "attempt": self.attempt,
+            "status": status,
+            "bytes": nbytes,
+            "new_connection": "connect" in self.phases,
+        }
+        if wire_bytes is not None:
+            fields["wire_bytes"] = wire_bytes
+        for name, seconds in self.phases.items():
+            fields[f"{name}_ms"] = _ms(seconds)
+        if self.headers_at is not None:
+            waited = self.headers_at - self.start - sum(self.phases.values())
+            fields["ttfb_ms"] = _ms(max(0.0, waited))
+            fields["download_ms"] = _ms(end - self.headers_at)
+        fields["total_ms"] = _ms(end - self.start)
+        if error:
+            fields["error"] = error
+        record("request", **fields)
+
+
+def start_request(url: str, attempt: int, transport: str = "requests") -> RequestTimer:
+    """Begin timing an attempt; it is this thread's current request until done()."""
+    t = RequestTimer(url, attempt, transport)
+    _local.request = t
+    return t
+
+
+def current_request() -> Optional[RequestTimer]:
+    return getattr(_local, "request", None)
+
+
+def events() -> List[Dict[str, Any]]:
+    with _lock:
+        return list(_events)
+
+
+def reset() -> None:
+    with _lock:
+        _events.clear()
+
+
+def write_report(path: str = RUN_REPORT_FILE) -> int:
+    """Write this run's events as JSON lines; returns how many were written."""
+    evs = events()
+    with open(path, "w", encoding="utf-8") as f:
+        for e in evs:
+            f.write(json.dumps(e, ensure_ascii=False, separators=(",", ":")))
+            f.write("\n")
+    return len(evs)
+
+
+def read_report(path: str = RUN_REPORT_FILE) -> List[Dict[str, Any]]:
+    out = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                out.append(json.loads(line))
+    return out
+
+
+def _number(value: float) -> str:
+    value = float(value)
+    return str(int(value)) if value.is_integer() else format(value, ".9g")
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# (metric, type, help)
+_PROM_METRICS = (
+    ("wolfie_http_requests_total", "counter", "HTTP attempts by menu and status code (0 = no response)."),
+    ("wolfie_http_phase_seconds_total", "counter", "Time spent per HTTP phase: connect, tls, ttfb, download."),
+    ("wolfie_http_response_bytes_total", "counter", "Response body bytes received."),
+    ("wolfie_http_new_connections_total", "counter", "Attempts that opened a new connection."),
+    ("wolfie_decode_seconds_total", "counter", "Time spent decoding response bodies."),
+    ("wolfie_walk_seconds_total", "counter", "Time spent walking menu sections."),
+    ("wolfie_stage_seconds", "gauge", "Duration of whole-run stages such as prefetch."),
+    ("wolfie_output_items", "gauge", "Food items in each published location file."),
+    ("wolfie_output_ok", "gauge", "1 if the location's published status is ok."),
+    ("wolfie_scraper_seconds", "gauge", "Wall time of each location's scraper."),
+    ("wolfie_scraper_ok", "gauge", "1 if the location's scraper finished without raising."),
+    ("wolfie_run_seconds", "gauge", "Wall time of the whole run."),
+    ("wolfie_run_failed_scrapers", "gauge", "Scrapers that raised during the run."),
+)
+
+
+def prometheus_text(evs: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Aggregate events (default: this run's) into Prometheus text exposition format."""
+    samples: Dict[str, Dict[Labels, float]] = {name: {} for name, _, _ in _PROM_METRICS}
+
+    def add(metric: str, value: float, **labels: Any) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        samples[metric][key] = samples[metric].get(key, 0.0) + value
+
+    def put(metric: str, value: float, **labels: Any) -> None:
+        samples[metric][tuple(sorted((k, str(v)) for k, v in labels.items()))] = value
+
+    for e in events() if evs is None else evs:
+        kind = e.get("event")
+        if kind == "request":
+            menu = e.get("menu", "")
+            add("wolfie_http_requests_total", 1, menu=menu, code=e.get("status") or 0)
+            for phase in ("connect", "tls", "ttfb", "download"):
+                if f"{phase}_ms" in e:
+                    add("wolfie_http_phase_seconds_total", e[f"{phase}_ms"] / 1000, menu=menu, phase=phase)
+            add("wolfie_http_response_bytes_total", e.get("bytes") or 0, menu=menu)
+            add("wolfie_http_new_connections_total", 1 if e.get("new_connection") else 0, menu=menu)
+        elif kind == "stage":
+            stage = e.get("stage")
+            if stage == "decode":
+                add("wolfie_decode_seconds_total", e["ms"] / 1000, menu=e.get("menu", ""))
+            elif stage == "walk":
+                add("wolfie_walk_seconds_total", e["ms"] / 1000, location=e.get("location", ""))
+            else:
+                put("wolfie_stage_seconds", e["ms"] / 1000, stage=stage)
+        elif kind == "output":
+            put("wolfie_output_items", e.get("items", 0), location=e.get("location", ""))
+            put("wolfie_output_ok", 1 if e.get("status") == "ok" else 0, location=e.get("location", ""))
+        elif kind == "scraper":
+            put("wolfie_scraper_seconds", e.get("seconds", 0), location=e.get("location", ""))
+            put("wolfie_scraper_ok", 1 if e.get("ok") else 0, location=e.get("location", ""))
+        elif kind == "run":
+            put("wolfie_run_seconds", e.get("seconds", 0))
+            put("wolfie_run_failed_scrapers", len(e.get("failed") or []))
+
+    lines = []
+    for name, kind, help_text in _PROM_METRICS:
+        if not samples[name]:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(samples[name].items()):
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {_number(value)}" if label_text else f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str = PROMETHEUS_FILE, evs: Optional[List[Dict[str, Any]]] = None) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text(evs))
+
+
+if __name__ == "__main__":
+    # 把保存下来的运行报告转换成 Prometheus 文本格式
+    sys.stdout.write(prometheus_text(read_report(sys.argv[1] if len(sys.argv) > 1 else RUN_REPORT_FILE)))
@@ -0,0 +1,292 @@
+import datetime
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import metrics
+from http_cache import HttpCache
+
+# 设置 NUTRISLICE_BASE_URL 可指向别的服务器，例如 benchmarks/mock_nutrislice.py
+API_BASE = os.environ.get("NUTRISLICE_BASE_URL", "https://stonybrook.api.nutrislice.com").rstrip("/")
+WEB_BASE = "https://stonybrook.nutrislice.com"
+
+WEEK_URL_TEMPLATE = (
+    "{base}/menu/api/weeks/school/{school}/menu-type/{menu_type}/{year}/{month}/{day}/?format=json"
+)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (SBU Student Project)",
+    "Accept": "application/json",
+}
+
+# (connect, read) 秒；所有 Nutrislice 请求统一在这里配置
+TIMEOUT: Tuple[float, float] = (5, 25)
+
+# 每个 host 最多同时保持的连接数；超出时排队等待而不是新开连接
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 10
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# 设置 WOLFIE_HTTP_CACHE=0 可关闭磁盘缓存
+CACHE: Optional[HttpCache] = None if os.environ.get("WOLFIE_HTTP_CACHE") == "0" else HttpCache()
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# 设置后每次请求（包括重试）前都要先拿到一个令牌；日常抓取不限速，backfill 会设置它
+RATE_LIMITER: Optional[TokenBucket] = None
+
+# 整次运行的截止时间（time.monotonic()），由 set_run_budget() 设置；过了之后不再发新请求，
+# 重试的等待和单次请求的超时也不会超过它
+RUN_DEADLINE: Optional[float] = None
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def set_run_budget(seconds: Optional[float]) -> None:
+    """Give the rest of the run `seconds` for network I/O (None: no limit)."""
+    global RUN_DEADLINE
+    RUN_DEADLINE = None if seconds is None else time.monotonic() + seconds
+
+
+def time_left() -> Optional[float]:
+    """Seconds until RUN_DEADLINE (may be negative), or None without a deadline."""
+    if RUN_DEADLINE is None:
+        return None
+    return RUN_DEADLINE - time.monotonic()
+
+
+def within_budget(seconds: float) -> float:
+    """seconds, shortened to what is left of the run budget."""
+    left = time_left()
+    return seconds if left is None else max(0.0, min(seconds, left))
+
+
+def check_deadline(url: str, delay: float = 0.0) -> None:
+    """Raise DeadlineExceeded if a request to url starting delay seconds from now would miss the deadline."""
+    left = time_left()
+    if left is not None and delay >= left:
+        raise DeadlineExceeded(f"Run deadline reached before fetching {url}")
+
+
+class _TimedConnection:
+    """Reports connect (DNS + TCP) and TLS handshake times to the request timed on this thread."""
+
+    _tcp_seconds = 0.0
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        self._tcp_seconds = time.perf_counter() - start
+        return sock
+
+    def connect(self) -> None:
+        start = time.perf_counter()
+        self._tcp_seconds = 0.0
+        super().connect()
+        timer = metrics.current_request()
+        if timer is not None:
+            timer.phase("connect", self._tcp_seconds)
+            if isinstance(self, HTTPSConnection):
+                timer.phase("tls", time.perf_counter() - start - self._tcp_seconds)
+
+
+class _TimedHTTPConnection(_TimedConnection, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnection, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report their handshake times to metrics."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def week_url(school: str, menu_type: str, d: datetime.date) -> str:
+    return WEEK_URL_TEMPLATE.format(
+        base=API_BASE,
+        school=school,
+        menu_type=menu_type,
+        year=d.year,
+        month=f"{d.month:02d}",
+        day=f"{d.day:02d}",
+    )
+
+
+def menu_url(school: str, menu_type: str, d: datetime.date) -> str:
+    """Public Nutrislice page for a menu (what the site links to)."""
+    return f"{WEB_BASE}/menu/{school}/{menu_type}/{d.strftime('%Y-%m-%d')}"
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session (keep-alive across all scrapers)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                s.headers.update(HEADERS)
+                adapter = TimedHTTPAdapter(
+                    pool_connections=POOL_CONNECTIONS,
+                    pool_maxsize=POOL_MAXSIZE,
+                    pool_block=True,
+                    max_retries=0,
+                )
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _session = s
+    return _session
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential backoff; honours a numeric Retry-After header."""
+    if retry_after:
+        try:
+            return min(float(retry_after), BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _wire_bytes(r: requests.Response) -> Optional[int]:
+    """Bytes read off the socket (before content decoding), when the transport can tell."""
+    tell = getattr(r.raw, "tell", None)
+    try:
+        return tell() if tell is not None else None
+    except Exception:
+        return None
+
+
+def get(
+    url: str,
+    timeout: Optional[Tuple[float, float]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> requests.Response:
+    """GET with retry on 429/5xx and connection errors; raises on final failure."""
+    session = get_session()
+    attempt = 0
+    while True:
+        if RATE_LIMITER is not None:
+            RATE_LIMITER.acquire()
+        check_deadline(url)
+        connect_timeout, read_timeout = timeout or TIMEOUT
+        timer = metrics.start_request(url, attempt)
+        try:
+            # stream=True 只是为了把等待响应头和下载 body 分开计时；body 照样在这里读完
+            r = session.get(
+                url,
+                timeout=(within_budget(connect_timeout), within_budget(read_timeout)),
+                headers=headers,
+                stream=True,
+            )
+            timer.headers()
+            r.content
+        except (requests.ConnectionError, requests.Timeout) as e:
+            timer.done(error=type(e).__name__)
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            check_deadline(url, delay)
+            time.sleep(delay)
+            attempt += 1
+            continue
+        timer.done(r.status_code, len(r.content), _wire_bytes(r))
+
+        if r.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            delay = backoff_delay(attempt, r.headers.get("Retry-After"))
+            r.close()
+            check_deadline(url, delay)
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        r.raise_for_status()
+        return r
+
+
+def timed_decode(url: str, content: bytes, decode: Callable[[bytes], Any]) -> Any:
+    """decode(content), recorded as a "decode" stage for url's menu."""
+    with metrics.timer("decode", menu=metrics.menu_label(url), bytes=len(content)):
+        return decode(content)
+
+
+def get_json(url: str, parse: Optional[Callable[[bytes], Any]] = None) -> Any:
+    """Decoded JSON for url, revalidating a cached copy with a conditional GET.
+
+    parse turns the raw body into the payload (default json.loads); the cache
+    keeps one parsed result per parser.
+    """
+    decode = parse or json.loads
+    if CACHE is None:
+        return timed_decode(url, get(url).content, decode)
+
+    parser = getattr(decode, "__qualname__", "")
+    meta = CACHE.lookup(url, parser)
+    r = get(url, headers=CACHE.conditional_headers(meta))
+    if r.status_code == 304 and meta:
+        try:
+            payload = CACHE.load(url)
+        except Exception:
+            payload = None
+        else:
+            CACHE.revalidated(url, meta)
+            return payload
+        r = get(url)
+
+    payload = timed_decode(url, r.content, decode)
+    CACHE.store(url, r.headers, payload, parser)
+    return payload
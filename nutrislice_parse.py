@@ -0,0 +1,313 @@
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import metrics
+
+# 每个地点用一组声明式规则配置 walker，而不是各自复制一份解析代码。
+#   header_mode "implicit": 没有 food 的条目只要有文字就当作档口标题
+#   header_mode "flagged":  只有带 is_section_title / is_station_header 的条目才是标题
+#   strip_sections: 分类名去掉首尾空白，只剩空白的归到当前标题（Roth、Dental、Jasmine 原来就这样）
+IMPLICIT_HEADERS: Dict[str, Any] = {
+    "header_mode": "implicit",
+    "header_keys": ("name", "text", "label", "description", "menu_item_name"),
+    "header_category_fallback": True,
+    "strip_sections": False,
+}
+
+FLAGGED_HEADERS: Dict[str, Any] = {
+    "header_mode": "flagged",
+    "header_keys": ("text", "name", "label", "description", "menu_item_name"),
+    "header_category_fallback": False,
+    "strip_sections": True,
+}
+
+
+def _name(obj: Any) -> Any:
+    return obj.get("name") if type(obj) is dict else None
+
+
+# walker 实际会读到的 menu_item 字段；其余（营养、过敏原、图片、图标……）解析时直接丢弃
+_ITEM_KEYS = (
+    "text", "name", "label", "description", "menu_item_name",
+    "is_section_title", "is_station_header", "is_holiday",
+    "category_name", "station",
+)
+
+
+def slim_item(mi: Any, strings: Dict[str, str]) -> Any:
+    """Keep only the fields walk_sections() and closed_message() look at.
+
+    Repeated strings are shared through `strings`, one table per parsed week.
+    """
+    if type(mi) is not dict:
+        return mi
+    out = {}
+    for k in _ITEM_KEYS:
+        if k in mi:
+            v = mi[k]
+            out[k] = strings.setdefault(v, v) if type(v) is str else v
+    for k in ("food", "menu_category", "category"):
+        v = mi.get(k)
+        if type(v) is dict:
+            name = v.get("name")
+            if type(name) is str:
+                name = strings.setdefault(name, name)
+            # 空 dict 要保持为假值：walker 用 food 的真假判断是否为标题行
+            out[k] = {"name": name} if v else {}
+        elif v is not None:
+            out[k] = v
+    return out
+
+
+_WS = re.compile(rb"[ \t\n\r]*")
+_STR = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_STRING = re.compile(_STR, re.S)
+# 跳过容器时只停在括号上：其余字节和整段字符串一次吞掉，字符串里的括号不算数
+_NEXT_BRACKET = re.compile(rb'[^"\[\]{}]*(?:' + _STR + rb'[^"\[\]{}]*)*[\[\]{}]', re.S)
+_SCALAR_END = re.compile(rb"[ \t\n\r,\]}]")
+
+
+class _Scanner:
+    """Walks the outer containers of a JSON body directly on the bytes.
+
+    Values the caller wants are sliced out and decoded on their own; everything
+    else is skipped by matching brackets, so the body is never decoded to str
+    and the full week object graph never exists in memory at once.
+    """
+
+    def __init__(self, b: bytes):
+        self.b = b
+        self.i = 0
+
+    def peek(self) -> bytes:
+        self.i = _WS.match(self.b, self.i).end()
+        return self.b[self.i : self.i + 1]
+
+    def skip(self) -> None:
+        c = self.peek()
+        if c == b'"':
+            m = _STRING.match(self.b, self.i)
+            if m is None:
+                raise ValueError(f"Unterminated string at offset {self.i}")
+            self.i = m.end()
+        elif c in (b"{", b"["):
+            depth = 1
+            i = self.i + 1
+            while True:
+                m = _NEXT_BRACKET.match(self.b, i)
+                if m is None:
+                    raise ValueError(f"Unterminated container at offset {self.i}")
+                i = m.end()
+                if self.b[i - 1] in b"{[":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if not depth:
+                        self.i = i
+                        return
+        else:
+            m = _SCALAR_END.search(self.b, self.i)
+            self.i = m.start() if m else len(self.b)
+
+    def value(self) -> Any:
+        self.peek()
+        start = self.i
+        self.skip()
+        return json.loads(self.b[start : self.i])
+
+    def _take(self, expected: bytes) -> bytes:
+        c = self.peek()
+        if not c or c not in expected:
+            raise ValueError(f"Expected {expected!r} at offset {self.i}, got {c!r}")
+        self.i += 1
+        return c
+
+    def members(self) -> Iterator[Any]:
+        """Yield each key of an object; the caller must consume its value."""
+        self._take(b"{")
+        if self.peek() == b"}":
+            self.i += 1
+            return
+        while True:
+            key = self.value()
+            self._take(b":")
+            yield key
+            if self._take(b",}") == b"}":
+                return
+
+    def elements(self) -> Iterator[None]:
+        """Yield once per array element; the caller must consume it."""
+        self._take(b"[")
+        if self.peek() == b"]":
+            self.i += 1
+            return
+        while True:
+            yield None
+            if self._take(b",]") == b"]":
+                return
+
+
+def _scan_day(sc: _Scanner, strings: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    if sc.peek() != b"{":
+        sc.skip()
+        return None
+    date = None
+    items: List[Any] = []
+    for key in sc.members():
+        if key == "date":
+            date = sc.value()
+        elif key == "menu_items" and sc.peek() == b"[":
+            for _ in sc.elements():
+                items.append(slim_item(sc.value(), strings))
+        else:
+            sc.skip()
+    return {"date": date, "menu_items": items}
+
+
+def parse_week(raw: bytes) -> Dict[str, Any]:
+    """Incrementally parse a /menu/api/weeks/ body into {"days": [...]}.
+
+    Works on the raw bytes: only "days", each day's "date" and its menu items
+    are decoded, and every item is reduced with slim_item() as soon as it is.
+    """
+    sc = _Scanner(raw.encode("utf-8") if isinstance(raw, str) else bytes(raw))
+    # 驻留表只在这一周内有效：同一周里重复的菜名/档口名共用一个 str，解析完即释放
+    strings: Dict[str, str] = {}
+    days: List[Dict[str, Any]] = []
+    if sc.peek() != b"{":
+        sc.skip()
+        return {"days": days}
+    for key in sc.members():
+        if key == "days" and sc.peek() == b"[":
+            for _ in sc.elements():
+                day = _scan_day(sc, strings)
+                if day is not None:
+                    days.append(day)
+        else:
+            sc.skip()
+    return {"days": days}
+
+
+def find_day(data: Dict[str, Any], date_str: str) -> Optional[Dict[str, Any]]:
+    for d in data.get("days", []):
+        if d.get("date") == date_str:
+            return d
+    return None
+
+
+def closed_message(menu_items: List[Any]) -> Optional[str]:
+    """Holiday/closure text when the whole day is a single is_holiday entry."""
+    if len(menu_items) != 1:
+        return None
+    mi = menu_items[0]
+    if type(mi) is dict and mi.get("is_holiday") and isinstance(mi.get("text"), str):
+        return mi["text"].strip()
+    return None
+
+
+def walk_sections(menu_items: Iterable[Any], rules: Dict[str, Any] = IMPLICIT_HEADERS) -> Dict[str, List[str]]:
+    """One pass over menu_items -> {section: food names}, deduped, first-seen order.
+
+    Foods without a usable category inherit the most recent header row.
+    """
+    with metrics.timer("walk") as stage:
+        section_map = _walk(menu_items, rules)
+        stage["items"] = sum(len(names) for names in section_map.values())
+    return section_map
+
+
+def _walk(menu_items: Iterable[Any], rules: Dict[str, Any]) -> Dict[str, List[str]]:
+    flagged = rules["header_mode"] == "flagged"
+    header_keys = rules["header_keys"]
+    category_fallback = rules["header_category_fallback"]
+    strip_sections = rules["strip_sections"]
+
+    buckets: Dict[str, tuple] = {}
+    current: Optional[str] = None
+
+    for mi in menu_items:
+        if type(mi) is not dict:
+            continue
+
+        food = mi.get("food")
+        if not food:
+            if flagged and not (mi.get("is_section_title") or mi.get("is_station_header")):
+                continue
+            header = None
+            for k in header_keys:
+                v = mi.get(k)
+                if isinstance(v, str):
+                    v = v.strip()
+                    if v:
+                        header = v
+                        break
+            if header is None and category_fallback:
+                v = _name(mi.get("category"))
+                if isinstance(v, str):
+                    header = v.strip() or None
+            if header:
+                current = header
+            continue
+
+        name = _name(food)
+        if not isinstance(name, str):
+            continue
+        name = name.strip()
+        if not name:
+            continue
+
+        sec = (
+            _name(mi.get("menu_category"))
+            or _name(mi.get("category"))
+            or mi.get("category_name")
+            or mi.get("station")
+        )
+        if not sec or type(sec) is not str or (sec == "Other" and current):
+            sec = current or "Other"
+        elif strip_sections:
+            sec = sec.strip() or current or "Other"
+
+        bucket = buckets.get(sec)
+        if bucket is None:
+            bucket = buckets[sec] = ([], set())
+        names, seen = bucket
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+
+    return {sec: names for sec, (names, _) in buckets.items()}
+
+
+def day_result(
+    data: Dict[str, Any], date_str: str, rules: Dict[str, Any], detect_closed: bool = False
+) -> Tuple[str, str, List[str]]:
+    """(status, message, items) for one day of a weekly payload, as the scrapers report a section."""
+    day_block = find_day(data, date_str)
+    if not day_block:
+        return "no_data_today", f"API data does not contain {date_str}.", []
+
+    menu_items = day_block.get("menu_items") or []
+    if not menu_items:
+        return "no_data_today", f"{date_str} menu_items empty.", []
+
+    if detect_closed:
+        closed = closed_message(menu_items)
+        if closed is not None:
+            return "closed", closed, []
+
+    items = flatten_sections(walk_sections(menu_items, rules))
+    if not items:
+        return "no_data_today", "No food names parsed.", []
+    return "ok", "Menu fetched.", items
+
+
+def dedupe_preserve_order(items: Iterable[str]) -> List[str]:
+    return list(dict.fromkeys(items))
+
+
+def flatten_sections(section_map: Dict[str, List[str]]) -> List[str]:
+    merged: List[str] = []
+    for names in section_map.values():
+        merged.extend(names)
+    return dedupe_preserve_order(merged)
@@ -0,0 +1,177 @@
+import datetime
+import html
+import os
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import locations
+
+INDEX_FILE = "index.html"
+
+# index.html 里 #dining-halls-container 内的这两行之间由本模块生成，其余部分手写
+START_MARKER = "<!-- prerender:start -->"
+END_MARKER = "<!-- prerender:end -->"
+
+# 与 index.html 的 setupMealButtons() 一致；周末只有 Brunch（key 仍是 lunch）和 Dinner
+WEEKDAY_MEALS = ("breakfast", "lunch", "dinner", "late-night")
+WEEKEND_MEALS = ("lunch", "dinner")
+
+# JS 第一次渲染前显示的餐段（currentMeal 的初始值）；按时间选会让 index.html 每次运行都变
+DEFAULT_MEAL = "lunch"
+
+_BREAKFAST = ["hot breakfast", "chef", "grill breakfast"]
+_LUNCH = ["chef", "rooted", "grill lunch", "pasta", "pizza"]
+_DINNER = ["rooted", "grill dinner", "pasta", "pizza"]
+_LATE_NIGHT = ["late night", "pasta", "pizza"]
+
+
+def allowed_sections(meal: str, is_weekend: bool) -> List[str]:
+    """Must match getDiningHallAllowedSections() in index.html."""
+    if is_weekend:
+        table = {"lunch": _BREAKFAST + _LUNCH, "dinner": _DINNER + _LATE_NIGHT, "late-night": _LATE_NIGHT}
+    else:
+        table = {"breakfast": _BREAKFAST, "lunch": _LUNCH, "dinner": _DINNER, "late-night": _LATE_NIGHT}
+    return table.get(meal, [])
+
+
+def _esc(value: Any) -> str:
+    return html.escape(str(value), quote=True)
+
+
+def _items(items: List[Any], url: Optional[str] = None) -> str:
+    if url is None:
+        lis = "".join(f'<li class="menu-item"><span>{_esc(i)}</span></li>' for i in items)
+    else:
+        lis = "".join(f'<li class="menu-item"><a href="{_esc(url)}" target="_blank">{_esc(i)}</a></li>' for i in items)
+    return f'<ul class="menu-items">{lis}</ul>'
+
+
+def _stale_note(obj: Optional[Dict[str, Any]]) -> str:
+    """Must match staleNote() in index.html."""
+    if not obj or obj.get("status") != "stale":
+        return ""
+    date = obj.get("date") or obj.get("menu_date")
+    showing = f" — showing {_esc(date)}" if date else ""
+    return f'<div class="stale-note">Couldn\'t refresh this menu{showing}.</div>'
+
+
+def _category(section: str, body: str, extra: str = "") -> str:
+    return (
+        '<div class="menu-category"><div class="category-header">'
+        f'<span class="category-title"><span class="category-icon">🍴</span> {_esc(section)}</span>{extra}'
+        f"</div>{body}</div>"
+    )
+
+
+def render_dining_hall(loc: Dict[str, Any], data: Optional[Dict[str, Any]], meal: str, today: datetime.date) -> str:
+    if not data:
+        return '<div class="loading-message">Loading menu...</div>'
+    if locations.hall_hours(loc["id"], today) == "Closed":
+        return '<div class="closed-sign">Closed Today</div>'
+
+    key = "late_night" if meal == "late-night" else meal
+    if data.get("is_weekend"):
+        key = {"breakfast": "brunch", "lunch": "brunch", "late_night": "dinner"}.get(key, key)
+    keywords = allowed_sections(meal, bool(data.get("is_weekend")))
+    blocks = [
+        b
+        for b in (data.get("meals") or {}).get(key) or []
+        if any(k in (b.get("section") or "").lower() for k in keywords)
+    ]
+    note = _stale_note(data)
+    if not blocks:
+        return note + '<div class="no-menu">No menu posted for this meal period.</div>'
+    return note + "".join(_category(b.get("section") or "", _items(b.get("items") or [])) for b in blocks)
+
+
+def render_stations(loc: Dict[str, Any], data: Optional[Dict[str, Any]], today: datetime.date) -> str:
+    if not data:
+        return '<div class="loading-message">Loading info...</div>'
+
+    sections = list(data.get("sections") or [])
+    for st in loc.get("stations") or []:
+        if not st.get("always_show"):
+            continue
+        if not any(s.get("section") and locations.station_matches(st, s["section"]) for s in sections):
+            sections.append({"section": st["section"], "items": st.get("items") or [], "menu_url": st.get("menu_url")})
+    if not sections:
+        return '<div class="no-menu">No data available</div>'
+
+    out = []
+    for s in sections:
+        hours = locations.station_hours(loc["id"], s.get("section") or "", today)
+        # 开/关门标记取决于访问时刻，留给 JS；这里只放当天的营业时间
+        if hours == "Closed":
+            extra = f'<span class="station-hours text-red">{_esc(hours)}</span>'
+            body = '<div class="closed-sign">Closed Today</div>'
+        else:
+            extra = f'<span class="station-hours">{_esc(hours)}</span>'
+            body = _items(s.get("items") or ["View Menu on Nutrislice"], s.get("menu_url") or "#")
+            if s.get("items"):
+                body = _stale_note(s) + body
+        out.append(_category(s.get("section") or "", body, extra))
+    return "".join(out)
+
+
+def render_single(loc: Dict[str, Any], data: Optional[Dict[str, Any]], today: datetime.date) -> str:
+    if locations.station_hours(loc["id"], "main", today) == "Closed":
+        return '<div class="closed-sign">Closed Today</div>'
+    if not data:
+        return '<div class="loading-message">Loading...</div>'
+    sections = data.get("sections") or []
+    if not sections:
+        return '<div class="no-menu">No menu items found</div>'
+    return _stale_note(data) + "".join(_category(s.get("section") or "", _items(s.get("items") or [])) for s in sections)
+
+
+def _view(key: str, body: str, visible: bool) -> str:
+    hidden = "" if visible else " hidden"
+    return f'<div class="menu-view" data-view="{key}"{hidden}>{body}</div>'
+
+
+def render_card(loc: Dict[str, Any], data: Optional[Dict[str, Any]], today: datetime.date) -> str:
+    """One .dining-hall card in the shape getHallCard()/showView() build, so the page can adopt it."""
+    if loc["layout"] == "dining-hall":
+        meals = WEEKEND_MEALS if (data or {}).get("is_weekend") else WEEKDAY_MEALS
+        views = "".join(_view(m, render_dining_hall(loc, data, m, today), m == DEFAULT_MEAL) for m in meals)
+    elif loc["layout"] == "single":
+        views = _view("all", render_single(loc, data, today), True)
+    else:
+        views = _view("all", render_stations(loc, data, today), True)
+
+    hours = locations.hall_hours(loc["id"], today)
+    return (
+        f'<div class="dining-hall" data-hall="{_esc(loc["id"])}">'
+        f'<div class="hall-header"><h3>{_esc(loc["name"])}</h3><span class="hall-status">{_esc(hours)}</span></div>'
+        f'<div class="menu-content">{views}</div></div>'
+    )
+
+
+def render(outputs: Dict[str, Optional[Dict[str, Any]]], today: Optional[datetime.date] = None) -> str:
+    if today is None:
+        today = datetime.datetime.now(ZoneInfo(locations.load_registry()["timezone"])).date()
+    return "\n".join(render_card(loc, outputs.get(loc["id"]), today) for loc in locations.all_locations())
+
+
+def inject(page: str, markup: str) -> str:
+    """Replace whatever is between the prerender markers in page with markup."""
+    start = page.find(START_MARKER)
+    end = page.find(END_MARKER, start)
+    if start < 0 or end < 0:
+        raise ValueError(f"{INDEX_FILE} has no {START_MARKER} ... {END_MARKER} block")
+    indent = page[page.rfind("\n", 0, end) + 1 : end]
+    return page[: start + len(START_MARKER)] + "\n" + markup + "\n" + indent + page[end:]
+
+
+def write_index(outputs: Dict[str, Optional[Dict[str, Any]]], path: str = INDEX_FILE) -> bool:
+    """Prerender every location into index.html; returns whether the file changed."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        page = f.read()
+    updated = inject(page, render(outputs))
+    if updated == page:
+        return False
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8", newline="") as f:
+        f.write(updated)
+    os.replace(tmp, path)
+    return True
@@ -0,0 +1,195 @@
+"""Opt-in profiling for scraper runs (--profile)."""
+import argparse
+import cProfile
+import linecache
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# 每次 --profile 运行在这里写三个文件：<name>-<time>.pstats（cProfile，可用 snakeviz 看）、
+# .alloc.txt（tracemalloc 峰值附近和退出时的分配）、.collapsed（各线程采样栈，可用 flamegraph.pl / speedscope 看）
+PROFILE_DIR = "profiles"
+
+# 分配报告列出的条数
+TOP_N = 25
+
+# 采样线程抓一次全部线程栈的间隔（秒）
+SAMPLE_INTERVAL = 0.005
+
+# 已追踪内存比上次快照多出这个比例时，重新拍一张“峰值附近”的快照
+PEAK_STEP = 1.25
+
+
+def _frame_label(code: Any) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Counts collapsed stacks of all other threads every interval seconds.
+
+    Also keeps a tracemalloc snapshot from around the traced-memory peak.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="profiling-sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Dict[str, int] = {}
+        self.peak_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_seen = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            # 线程池里的线程名带序号（ThreadPoolExecutor-0_3），去掉序号让同一个池合并成一棵树
+            names = {t.ident: re.sub(r"_\d+$", "", t.name) for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels: List[str] = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                key = ";".join(reversed(labels))
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+            if tracemalloc.is_tracing():
+                current, _ = tracemalloc.get_traced_memory()
+                if current > self._peak_seen * PEAK_STEP:
+                    self._peak_seen = current
+                    self.peak_snapshot = tracemalloc.take_snapshot()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class ThreadProfiles:
+    """One cProfile.Profile per thread started while installed.
+
+    Since 3.12 cProfile is built on sys.monitoring and a single profiler
+    already sees every thread, so nothing is installed there.
+    """
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def _start(self, frame: Any, event: str, arg: Any) -> None:
+        sys.setprofile(None)
+        p = cProfile.Profile()
+        with self._lock:
+            self.profiles.append(p)
+        p.enable()
+
+    def install(self) -> None:
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._start)
+
+    def uninstall(self) -> None:
+        if sys.version_info < (3, 12):
+            threading.setprofile(None)
+
+
+def _merged_stats(main: cProfile.Profile, others: List[cProfile.Profile]) -> pstats.Stats:
+    stats = pstats.Stats(main)
+    for p in others:
+        try:
+            stats.add(p)
+        except TypeError:
+            # 什么都没调用过的线程没有统计数据
+            pass
+    return stats
+
+
+def _allocation_lines(title: str, snapshot: tracemalloc.Snapshot, top: int) -> List[str]:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+    stats = snapshot.statistics("lineno")
+    total = sum(s.size for s in stats)
+    lines = [f"== {title}: {total / 1024:.1f} KiB in {len(stats)} sites; top {min(top, len(stats))}"]
+    for i, s in enumerate(stats[:top], 1):
+        where = s.traceback[0]
+        lines.append(f"#{i:<3} {s.size / 1024:>10.1f} KiB {s.count:>8} blocks  {where.filename}:{where.lineno}")
+        source = linecache.getline(where.filename, where.lineno).strip()
+        if source:
+            lines.append(f"       {source}")
+    lines.append("")
+    return lines
+
+
+def profiled(
+    name: str,
+    fn: Callable[..., Any],
+    *args: Any,
+    out_dir: str = PROFILE_DIR,
+    top: int = TOP_N,
+    interval: float = SAMPLE_INTERVAL,
+) -> Any:
+    """fn(*args) under cProfile, tracemalloc and the stack sampler; reports are written even if fn raises."""
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+
+    threads = ThreadProfiles()
+    sampler = StackSampler(interval)
+    main = cProfile.Profile()
+
+    tracemalloc.start()
+    sampler.start()
+    threads.install()
+    main.enable()
+    try:
+        return fn(*args)
+    finally:
+        main.disable()
+        threads.uninstall()
+        sampler.stop()
+        current, peak = tracemalloc.get_traced_memory()
+        at_exit = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        _merged_stats(main, threads.profiles).dump_stats(base + ".pstats")
+
+        lines = [f"traced memory: peak {peak / 1024:.1f} KiB, at exit {current / 1024:.1f} KiB", ""]
+        if sampler.peak_snapshot is not None:
+            lines += _allocation_lines("near peak", sampler.peak_snapshot, top)
+        lines += _allocation_lines("held at exit", at_exit, top)
+        with open(base + ".alloc.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+        with open(base + ".collapsed", "w", encoding="utf-8") as f:
+            for stack, count in sorted(sampler.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+        print(f"Profile written to {base}.pstats, {base}.alloc.txt, {base}.collapsed")
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", action="store_true", help="Profile the run (cProfile, tracemalloc, stack samples).")
+    parser.add_argument("--profile-dir", default=PROFILE_DIR, help="Where --profile writes its reports.")
+    parser.add_argument("--profile-top", type=int, default=TOP_N, help="Allocation sites listed per report.")
+
+
+def run(args: argparse.Namespace, name: str, fn: Callable[..., Any], *fn_args: Any) -> Any:
+    """fn(*fn_args), profiled when args.profile is set."""
+    if not args.profile:
+        return fn(*fn_args)
+    return profiled(name, fn, *fn_args, out_dir=args.profile_dir, top=args.profile_top)
+
+
+def cli(name: str, fn: Callable[[], Any]) -> Any:
+    """`if __name__ == "__main__"` entry for a single scraper: fn(), with --profile support."""
+    parser = argparse.ArgumentParser(description=f"Scrape {name} and write its JSON file.")
+    add_arguments(parser)
+    return run(parser.parse_args(), name, fn)
@@ -0,0 +1,248 @@
+import datetime
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set
+from zoneinfo import ZoneInfo
+
+import archive
+import bundle
+import locations
+import metrics
+import prerender
+import search_index
+
+# 按内容寻址的文件放在这里：文件名里带内容哈希，内容不变文件名就不变，可以永久缓存
+HASHED_DIR = "data"
+
+# 每次运行都会变、但不代表菜单有变化的字段；比较新旧输出时忽略
+VOLATILE_FIELDS = frozenset({"updated_at"})
+
+# 上次发布的这些状态还算可用的菜单，没赶上截止时间时可以拿来顶替
+USABLE_STATUSES = ("ok", "stale")
+
+# stale 档口从上次发布的内容里沿用的字段；营业时间等其余字段用本次的
+STALE_FIELDS = ("items", "date", "menu_date", "source_url")
+
+# 最近一次检查的时间单独记在这里，菜单没变时各地点的 JSON 不用重写
+HEARTBEAT_FILE = "heartbeat.json"
+
+_checked_lock = threading.Lock()
+# 本次运行中 write_output() 处理过的文件 -> 是否真的有变化
+_checked: Dict[str, bool] = {}
+
+
+def hashed_name(path: str, text: str) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{HASHED_DIR}/{stem}.{bundle.content_hash(text)}.json"
+
+
+def _write_text(path: str, text: str) -> None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return
+    except OSError:
+        pass
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_hashed(path: str, payload: Any) -> str:
+    """Write the minified, content-addressed copy of payload; return its name."""
+    text = bundle.dumps(payload)
+    name = hashed_name(path, text)
+    if not os.path.exists(name):
+        os.makedirs(HASHED_DIR, exist_ok=True)
+        _write_text(name, text)
+    return name
+
+
+def semantic_view(payload: Any) -> Any:
+    """payload without the fields that change on every run."""
+    if not isinstance(payload, dict):
+        return payload
+    return {k: v for k, v in payload.items() if k not in VOLATILE_FIELDS}
+
+
+def _load_existing(path: str) -> Any:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _stale_message(menu_date: Any) -> str:
+    if menu_date:
+        return f"Not refreshed before the run deadline; showing the menu from {menu_date}."
+    return "Not refreshed before the run deadline; showing the last published menu."
+
+
+def fill_stale(path: str, sections: List[Dict[str, Any]]) -> None:
+    """Give every section marked "stale" the menu last published for it in path.
+
+    Sections are matched by name; one without a usable previous menu becomes
+    a fetch_error instead.
+    """
+    existing = _load_existing(path)
+    previous: Dict[str, Dict[str, Any]] = {}
+    for sec in (existing or {}).get("sections") or []:
+        if isinstance(sec, dict) and sec.get("items") and sec.get("status", "ok") in USABLE_STATUSES:
+            previous.setdefault(sec.get("section"), sec)
+
+    for sec in sections:
+        if sec.get("status") != "stale":
+            continue
+        old = previous.get(sec.get("section"))
+        if old is None:
+            sec["status"] = "fetch_error"
+            continue
+        for key in STALE_FIELDS:
+            if key in old:
+                sec[key] = old[key]
+        sec["message"] = _stale_message(old.get("date") or old.get("menu_date"))
+
+
+def stale_output(path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """What to publish for a single-menu location that missed the run deadline.
+
+    The last published menu in path, marked "stale" and with this run's
+    updated_at; a fetch_error payload when there is none.
+    """
+    existing = _load_existing(path)
+    if not isinstance(existing, dict) or existing.get("status") not in USABLE_STATUSES:
+        return dict(payload, status="fetch_error")
+    out = dict(existing)
+    out["status"] = "stale"
+    out["message"] = _stale_message(existing.get("date"))
+    out["updated_at"] = payload.get("updated_at", existing.get("updated_at"))
+    return out
+
+
+def _location_id(path: str) -> str:
+    for loc in locations.all_locations():
+        if loc["file"] == path:
+            return loc["id"]
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _record_output(loc_id: str, path: str, payload: Any, changed: bool) -> None:
+    if not isinstance(payload, dict):
+        return
+    statuses: Dict[str, int] = {}
+    for sec in payload.get("sections") or []:
+        if isinstance(sec, dict):
+            st = str(sec.get("status", "ok"))
+            statuses[st] = statuses.get(st, 0) + 1
+    metrics.record(
+        "output",
+        location=loc_id,
+        file=path,
+        status=payload.get("status"),
+        items=sum(1 for _ in archive.rows_from_output(payload)),
+        sections=statuses,
+        changed=changed,
+    )
+
+
+def write_output(path: str, payload: Any) -> str:
+    """Write a location's output: the readable file at its stable name plus the hashed copy.
+
+    If the file on disk already holds the same menu (ignoring VOLATILE_FIELDS)
+    it is left untouched, old updated_at included, so its hash and git blob
+    stay the same. Every payload is also appended to the history archive.
+    """
+    loc_id = _location_id(path)
+    archive.record_output(loc_id, payload)
+
+    existing = _load_existing(path)
+    changed = existing is None or semantic_view(existing) != semantic_view(payload)
+    with _checked_lock:
+        _checked[path] = changed
+    _record_output(loc_id, path, payload, changed)
+
+    if not changed:
+        print(f"{path} unchanged; keeping existing file")
+        return write_hashed(path, existing)
+
+    # 先写临时文件再替换：进程中途被杀也不会留下半个 JSON
+    _write_text(path, json.dumps(payload, indent=2, ensure_ascii=False))
+    return write_hashed(path, payload)
+
+
+def write_heartbeat(path: str = HEARTBEAT_FILE) -> None:
+    tz = ZoneInfo(locations.load_registry()["timezone"])
+    with _checked_lock:
+        checked = dict(_checked)
+    by_file = {loc["file"]: loc["id"] for loc in locations.all_locations()}
+    heartbeat = {
+        "checked_at": datetime.datetime.now(tz).strftime("%Y-%m-%d %H:%M:%S %Z"),
+        "changed": sorted(by_file.get(p, p) for p, c in checked.items() if c),
+        "unchanged": sorted(by_file.get(p, p) for p, c in checked.items() if not c),
+    }
+    _write_text(path, json.dumps(heartbeat, indent=2, ensure_ascii=False))
+
+
+def _referenced(manifest: Optional[Dict[str, Any]]) -> Set[str]:
+    if not manifest:
+        return set()
+    names = set((manifest.get("files") or {}).values())
+    for key in ("bundle", "search"):
+        if manifest.get(key):
+            names.add(manifest[key])
+    return names
+
+
+def prune(keep: Set[str]) -> None:
+    """Delete hashed files that neither the new nor the previous manifest points at."""
+    try:
+        names = os.listdir(HASHED_DIR)
+    except OSError:
+        return
+    for name in names:
+        rel = f"{HASHED_DIR}/{name}"
+        if rel not in keep and name.endswith(".json"):
+            try:
+                os.remove(rel)
+            except OSError:
+                pass
+
+
+def publish() -> str:
+    """Hash every location's output, then write the bundle, search index and manifest.json,
+    and prerender the menus into index.html.
+
+    The previous manifest's files are kept for one more run, so a page that
+    loaded the old manifest can still fetch what it points at.
+    """
+    previous = bundle.load_output(locations.MANIFEST_FILE)
+
+    files: Dict[str, str] = {}
+    outputs: Dict[str, Any] = {}
+    for loc in locations.all_locations():
+        payload = outputs[loc["id"]] = bundle.load_output(loc["file"])
+        if payload is not None:
+            files[loc["id"]] = write_hashed(loc["file"], payload)
+
+    b = bundle.build_bundle(files)
+    text = bundle.dumps(b)
+    _write_text(bundle.BUNDLE_FILE, text)
+    bundle_name = write_hashed(bundle.BUNDLE_FILE, b)
+
+    index = search_index.build_index(outputs)
+    _write_text(search_index.SEARCH_FILE, bundle.dumps(index))
+    search_name = write_hashed(search_index.SEARCH_FILE, index)
+
+    locations.write_manifest(files=files, bundle_file=bundle_name, search_file=search_name)
+    prune(set(files.values()) | {bundle_name, search_name} | _referenced(previous))
+    prerender.write_index(outputs)
+    write_heartbeat()
+    return bundle_name
+
+
+if __name__ == "__main__":
+    # 手动维护的 east_side_retail.json 修改后可单独重新发布
+    print(f"Published {publish()}")
@@ -1,205 +1,19 @@
-import json
 import datetime
-from typing import Any, Dict, List, Optional
-
-import requests
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (SBU Student Project)",
-    "Accept": "application/json",
-}
-
-API_SCHOOL_SLUG = "roth"
-
-WEB_SCHOOL_SLUG = "roth-cafe"
-
-API_TEMPLATE = (
-    "https://stonybrook.api.nutrislice.com/menu/api/weeks/school/{school}/menu-type/"
-    "{slug}/{year}/{month}/{day}/?format=json"
-)
-
-FIXED_DATE = datetime.date(2026, 1, 27)
-
-ROTH_SECTIONS = [
-    {
-        "section": "Subway",
-        "type": "chain",
-        "slug": None,
-        "items": ["Click to view the official menu"],
-        "menu_url": "https://www.subway.com/en-us/menu",
-    },
-    {
-        "section": "Smash n' Shake",
-        "type": "static",
-        "slug": "smash-n-shake",
-        "menu_url": f"https://stonybrook.nutrislice.com/menu/{WEB_SCHOOL_SLUG}/smash-n-shake/{FIXED_DATE.strftime('%Y-%m-%d')}",
-    },
-    {
-        "section": "Savor",
-        "type": "static",
-        "slug": "chef-jet",
-        "menu_url": f"https://stonybrook.nutrislice.com/menu/{WEB_SCHOOL_SLUG}/chef-jet/{FIXED_DATE.strftime('%Y-%m-%d')}",
-    },
-    {
-        "section": "Popeyes",
-        "type": "chain",
-        "slug": None,
-        "items": ["Click to view the official menu"],
-        "menu_url": "https://www.popeyes.com/menu",
-    },
-]
-
-
-def safe_food_name(mi: Dict[str, Any]) -> Optional[str]:
-    food = mi.get("food") or {}
-    if isinstance(food, dict):
-        name = food.get("name")
-        if isinstance(name, str) and name.strip():
-            return name.strip()
-    return None
-
-
-def is_header_item(mi: Dict[str, Any]) -> bool:
-    if mi.get("food"):
-        return False
-    return bool(mi.get("is_section_title") or mi.get("is_station_header"))
-
-
-def header_text(mi: Dict[str, Any]) -> Optional[str]:
-    for k in ("text", "name", "label", "description", "menu_item_name"):
-        v = mi.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip()
-    return None
-
-
-def pick_section_name(mi: Dict[str, Any], current_section: Optional[str]) -> str:
-    mc = mi.get("menu_category")
-    cat = mi.get("category")
-
-    mc_name = mc.get("name") if isinstance(mc, dict) else None
-    cat_name = cat.get("name") if isinstance(cat, dict) else None
-
-    sec = (
-        mc_name
-        or cat_name
-        or mi.get("category_name")
-        or mi.get("station")
-        or "Other"
-    )
-
-    if (not sec or sec == "Other") and current_section:
-        sec = current_section
-
-    if not isinstance(sec, str) or not sec.strip():
-        return current_section or "Other"
-
-    return sec.strip()
-
-
-def dedupe_preserve_order(items: List[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        if x not in seen:
-            seen.add(x)
-            out.append(x)
-    return out
-
-
-def flatten_blocks(section_map: Dict[str, List[str]]) -> List[str]:
-    merged: List[str] = []
-    for _, names in section_map.items():
-        merged.extend(names)
-    return dedupe_preserve_order(merged)
-
-
-def fetch_static_menu(menu_type_slug: str, date_obj: datetime.date) -> Dict[str, Any]:
-    url = API_TEMPLATE.format(
-        school=API_SCHOOL_SLUG,
-        slug=menu_type_slug,
-        year=date_obj.year,
-        month=f"{date_obj.month:02d}",
-        day=f"{date_obj.day:02d}",
-    )
-    date_str = date_obj.strftime("%Y-%m-%d")
-
-    try:
-        r = requests.get(url, headers=HEADERS, timeout=25)
-        r.raise_for_status()
-        data = r.json()
-
-
-        day_block = None
-        for d in data.get("days", []):
-            if d.get("date") == date_str:
-                day_block = d
-                break
-
-        if not day_block:
-            return {
-                "status": "no_data_today",
-                "message": f"API missing {date_str}",
-                "source_url": url,
-                "items": [],
-            }
-
-        menu_items = day_block.get("menu_items") or []
-        if not menu_items:
-            return {
-                "status": "no_data_today",
-                "message": f"{date_str} menu_items empty",
-                "source_url": url,
-                "items": [],
-            }
-
-     
-        if (
-            len(menu_items) == 1
-            and isinstance(menu_items[0], dict)
-            and menu_items[0].get("is_holiday")
-            and isinstance(menu_items[0].get("text"), str)
-        ):
-            return {
-                "status": "closed",
-                "message": menu_items[0].get("text").strip(),
-                "source_url": url,
-                "items": [],
-            }
-
-        section_map: Dict[str, List[str]] = {}
-        current_section: Optional[str] = None
-
-        for mi in menu_items:
-            if not isinstance(mi, dict):
-                continue
-
-            if is_header_item(mi):
-                ht = header_text(mi)
-                if ht:
-                    current_section = ht
-                continue
-
-            name = safe_food_name(mi)
-            if not name:
-                continue
-
-            sec = pick_section_name(mi, current_section)
-            section_map.setdefault(sec, []).append(name)
-
-        items = flatten_blocks(section_map)
-        if not items:
-            return {
-                "status": "no_data_today",
-                "message": "No food names parsed",
-                "source_url": url,
-                "items": [],
-            }
-
-        return {"status": "ok", "message": "Menu fetched.", "source_url": url, "items": items}
-
-    except Exception as e:
-        return {"status": "fetch_error", "message": f"Error: {e}", "source_url": url, "items": []}
+from typing import Any, Dict
+
+import async_fetch
+import locations
+import nutrislice_client
+import nutrislice_parse
+import profiling
+import publish
+
+FIXED_DATE = locations.fixed_menu_date()
+
+SECTION_RULES = nutrislice_parse.FLAGGED_HEADERS
+
+# chain 档口只给官网链接；static 档口从 Nutrislice 的固定日期菜单抓取（见 locations.json）
+ROTH_SECTIONS = locations.get_location("roth")["stations"]
 
 
 def main() -> None:
@@ -207,6 +21,8 @@ def main() -> None:
     now = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=-5)))
     updated_at = now.strftime("%Y-%m-%d %H:%M EST")
 
+    loc = locations.get_location("roth")
+
     out: Dict[str, Any] = {
         "location": "Roth Cafe",
         "date_fetched_from": FIXED_DATE.strftime("%Y-%m-%d"),
@@ -216,38 +32,46 @@ def main() -> None:
         "sections": [],
     }
 
-    any_error = False
+    static_secs = [sec for sec in ROTH_SECTIONS if sec["type"] == "static"]
+    fetched_by_slug = dict(zip(
+        [sec["menu_type"] for sec in static_secs],
+        async_fetch.run_sections(
+            [(sec["school"], sec["menu_type"], FIXED_DATE) for sec in static_secs],
+            SECTION_RULES,
+            detect_closed=True,
+        ),
+    ))
 
     for sec in ROTH_SECTIONS:
         entry: Dict[str, Any] = {
             "section": sec["section"],
             "type": sec["type"],
-            "menu_url": sec["menu_url"],
+            "menu_url": sec.get("menu_url") or nutrislice_client.menu_url(sec["web_school"], sec["menu_type"], FIXED_DATE),
             "items": sec.get("items", []),
             "status": "ok",
             "message": "",
         }
 
         if sec["type"] == "static":
-            fetched = fetch_static_menu(sec["slug"], FIXED_DATE)
+            fetched = fetched_by_slug[sec["menu_type"]]
             entry["status"] = fetched["status"]
             entry["message"] = fetched["message"]
             entry["source_url"] = fetched["source_url"]
             entry["items"] = fetched["items"]
 
-            if entry["status"] not in ("ok", "closed"):
-                any_error = True
-
         out["sections"].append(entry)
 
-    if any_error:
+    publish.fill_stale(loc["file"], out["sections"])
+    statuses = {sec["status"] for sec in out["sections"]}
+    if statuses - {"ok", "closed", "stale"}:
         out["status"] = "partial_error"
+    elif "stale" in statuses:
+        out["status"] = "stale"
 
-    with open("roth.json", "w", encoding="utf-8") as f:
-        json.dump(out, f, indent=2, ensure_ascii=False)
+    publish.write_output(loc["file"], out)
 
-    print("Successfully wrote roth.json")
+    print(f"Successfully wrote {loc['file']}")
 
 
 if __name__ == "__main__":
-    main()
+    profiling.cli("roth", main)
@@ -0,0 +1,173 @@
+import argparse
+import datetime
+import importlib
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+import archive
+import async_fetch
+import locations
+import metrics
+import nutrislice_client
+import profiling
+import publish
+import week_store
+
+MAX_WORKERS = 6
+
+# 预取阶段每个 host 同时在途的请求数
+PREFETCH_PER_HOST = async_fetch.PER_HOST_LIMIT
+
+# 整次运行花在网络请求上的总预算（秒）；到点没抓完的档口沿用上次发布的菜单（stale）
+RUN_BUDGET_SECONDS = 120.0
+
+
+def scraper_for(loc: Dict[str, Any]) -> Optional[Callable[[], None]]:
+    """Entry point that writes a location's JSON file, per locations.json.
+
+    "module:function" names a dedicated scraper. Locations without one but
+    with Nutrislice stations use the generic station scraper; the rest
+    (e.g. East Side Retail) are maintained by hand.
+    """
+    spec = loc.get("scraper")
+    if spec:
+        module_name, func_name = spec.split(":")
+        return getattr(importlib.import_module(module_name), func_name)
+    if locations.fetch_stations(loc["id"]):
+        sac_scrape = importlib.import_module("sac_scrape")
+        return lambda: sac_scrape.scrape_location(loc["id"])
+    return None
+
+
+def prefetch(today: datetime.date, loc_ids: List[str], per_host: int) -> None:
+    """Fetch every distinct (school, menu_type, date) once, before any scraper runs."""
+    plan = locations.fetch_plan(today, loc_ids)
+    start = time.perf_counter()
+
+    with metrics.timer("prefetch", menus=len(plan)) as stage:
+        results = async_fetch.run_weeks(plan, per_host=per_host)
+        stage["failed"] = sum(1 for r in results.values() if isinstance(r, BaseException))
+    for (school, menu_type, d), result in results.items():
+        if isinstance(result, BaseException):
+            # 失败的交给各 scraper 自己再请求一次并记录错误
+            print(f"Prefetch failed for {school}/{menu_type} {d}: {result}")
+
+    print(f"Prefetched {len(plan)} menus in {time.perf_counter() - start:.2f}s")
+
+
+def run_scraper(loc_id: str, entry: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    ok = False
+    with metrics.location(loc_id):
+        try:
+            entry()
+            ok = True
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.record("scraper", seconds=round(elapsed, 3), ok=ok)
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run every location scraper in one process.")
+    parser.add_argument(
+        "--only",
+        default="",
+        help="Comma-separated location ids from locations.json (default: all).",
+    )
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument(
+        "--week-mode",
+        action="store_true",
+        help="Fetch each (school, menu_type, week) once and serve the other days from the local store.",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=RUN_BUDGET_SECONDS,
+        help="Seconds the run may spend fetching; later stations reuse their last published menu (0: no limit).",
+    )
+    parser.add_argument(
+        "--report",
+        default=metrics.RUN_REPORT_FILE,
+        help="JSON-lines run report with per-request timings (empty to skip).",
+    )
+    parser.add_argument(
+        "--prometheus",
+        default=metrics.PROMETHEUS_FILE,
+        help="Prometheus text export of the run's metrics (empty to skip).",
+    )
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    return profiling.run(args, "scrape_all", run_all, args)
+
+
+def run_all(args: argparse.Namespace) -> int:
+    if args.week_mode:
+        week_store.WEEK_MODE = True
+
+    only = {m.strip() for m in args.only.split(",") if m.strip()}
+    jobs = []
+    for loc in locations.all_locations():
+        if only and loc["id"] not in only:
+            continue
+        entry = scraper_for(loc)
+        if entry is not None:
+            jobs.append((loc["id"], entry))
+
+    # 存档丢了照样抓取和发布菜单，但这次不写存档，并且让整个运行以失败退出
+    archive_missing = False
+    if archive.ENABLED:
+        try:
+            archive.check_expected()
+        except archive.ArchiveMissing as e:
+            print(f"ERROR: {e}; not archiving this run")
+            archive.ENABLED = False
+            archive_missing = True
+
+    nutrislice_client.set_run_budget(args.budget if args.budget > 0 else None)
+    start = time.perf_counter()
+    started_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+    failed: List[str] = []
+
+    today = datetime.datetime.now(ZoneInfo(locations.load_registry()["timezone"])).date()
+    prefetch(today, [loc_id for loc_id, _ in jobs], PREFETCH_PER_HOST)
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {pool.submit(run_scraper, loc_id, entry): loc_id for loc_id, entry in jobs}
+        for fut in as_completed(futures):
+            name = futures[fut]
+            try:
+                elapsed = fut.result()
+                print(f"[{name}] done in {elapsed:.2f}s")
+            except Exception:
+                failed.append(name)
+                print(f"[{name}] failed")
+                traceback.print_exc()
+
+    with metrics.timer("publish"):
+        print(f"Published {publish.publish()}")
+
+    elapsed = time.perf_counter() - start
+    metrics.record(
+        "run",
+        started_at=started_at,
+        seconds=round(elapsed, 3),
+        budget=args.budget,
+        deadline_hit=(nutrislice_client.time_left() or 0) < 0,
+        failed=sorted(failed),
+    )
+    if args.report:
+        print(f"Wrote {metrics.write_report(args.report)} events to {args.report}")
+    if args.prometheus:
+        metrics.write_prometheus(args.prometheus)
+
+    print(f"All scrapers finished in {elapsed:.2f}s ({len(failed)} failed)")
+    return 1 if failed or archive_missing else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
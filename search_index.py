@@ -0,0 +1,98 @@
+import bisect
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+import archive
+
+SEARCH_FILE = "search.index.json"
+
+# 页面照样显示 stale 档口（带提示），搜索也要搜得到；归档只收当天的 "ok"
+SEARCH_STATUSES = ("ok", "stale")
+
+_COMBINING = re.compile("[\u0300-\u036f]")
+_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase ASCII-folded words; must match tokenize() in index.html."""
+    folded = _COMBINING.sub("", unicodedata.normalize("NFKD", text)).lower()
+    return [t for t in _SPLIT.split(folded) if t]
+
+
+def trigrams(token: str) -> List[str]:
+    return [token[i : i + 3] for i in range(len(token) - 2)]
+
+
+def build_index(outputs: Dict[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Inverted index over every food name in today's outputs.
+
+    entries:   [food, location, section, meal] as indexes into strings/locations
+    tokens:    sorted vocabulary; a prefix query is a binary-search range
+    postings:  entry ids per token (parallel to tokens)
+    trigrams:  token ids per 3-gram, for matches inside a word ("izza")
+    """
+    strings: List[str] = []
+    string_ids: Dict[str, int] = {}
+
+    def sid(s: str) -> int:
+        i = string_ids.get(s)
+        if i is None:
+            i = string_ids[s] = len(strings)
+            strings.append(s)
+        return i
+
+    loc_ids = list(outputs)
+    entries: List[Tuple[int, int, int, int]] = []
+    seen = set()
+    by_token: Dict[str, List[int]] = {}
+
+    for li, loc_id in enumerate(loc_ids):
+        payload = outputs[loc_id]
+        if not payload:
+            continue
+        for _, meal, section, food in archive.rows_from_output(payload, SEARCH_STATUSES):
+            if not isinstance(food, str) or not food.strip():
+                continue
+            entry = (sid(food), li, sid(section), sid(meal))
+            if entry in seen:
+                continue
+            seen.add(entry)
+            eid = len(entries)
+            entries.append(entry)
+            for tok in dict.fromkeys(tokenize(food)):
+                by_token.setdefault(tok, []).append(eid)
+
+    tokens = sorted(by_token)
+    grams: Dict[str, List[int]] = {}
+    for ti, tok in enumerate(tokens):
+        for g in dict.fromkeys(trigrams(tok)):
+            grams.setdefault(g, []).append(ti)
+
+    return {
+        "locations": loc_ids,
+        "strings": strings,
+        "entries": [list(e) for e in entries],
+        "tokens": tokens,
+        "postings": [by_token[t] for t in tokens],
+        "trigrams": dict(sorted(grams.items())),
+    }
+
+
+def search(index: Dict[str, Any], query: str) -> List[int]:
+    """Entry ids matching every word of query (Python twin of searchMenus() in index.html)."""
+    tokens = index["tokens"]
+    result: Optional[set] = None
+    for term in tokenize(query):
+        lo = bisect.bisect_left(tokens, term)
+        hi = bisect.bisect_left(tokens, term + "\uffff")
+        matched = set(range(lo, hi))
+        if len(term) >= 3:
+            cands: Optional[set] = None
+            for g in trigrams(term):
+                ids = set(index["trigrams"].get(g, ()))
+                cands = ids if cands is None else cands & ids
+            matched |= {ti for ti in cands or () if term in tokens[ti]}
+        hits = {eid for ti in matched for eid in index["postings"][ti]}
+        result = hits if result is None else result & hits
+    return sorted(result or ())
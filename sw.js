@@ -0,0 +1,116 @@
+// Wolfie Dine service worker
+// - 页面和它 <link> 引用的图标预缓存，首屏不依赖网络
+// - 菜单 JSON：先返回缓存（stale-while-revalidate），后台再取新版本；内容有变化时通知页面重新渲染
+// - data/ 下带内容哈希的文件内容永远不变，缓存命中就直接用
+
+const STATIC_CACHE = 'wolfie-static-v2';
+const DATA_CACHE = 'wolfie-data-v1';
+
+const PRECACHE_URLS = [
+    './',
+    'index.html',
+    'favicon.ico',
+    'favicon-32x32.png',
+    'apple-touch-icon.png',
+    'wolfiedine_icon_16.png',
+    'wolfiedine_icon_48.png',
+    'wolfiedine_icon_192.png'
+];
+
+const HASHED_PREFIX = new URL('data/', self.registration.scope).pathname;
+const MANIFEST_PATH = new URL('manifest.json', self.registration.scope).pathname;
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(STATIC_CACHE)
+            .then(cache => cache.addAll(PRECACHE_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    const keep = [STATIC_CACHE, DATA_CACHE];
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names.filter(n => !keep.includes(n)).map(n => caches.delete(n))))
+            .then(() => self.clients.claim())
+    );
+});
+
+// 去掉 ?t= 之类的查询参数，同一个文件只缓存一份
+function cacheKey(request) {
+    const url = new URL(request.url);
+    url.search = '';
+    return url.href;
+}
+
+async function notifyClients(message) {
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach(client => client.postMessage(message));
+}
+
+// manifest 更新后，删掉新旧 manifest 都不再引用的哈希文件
+async function trimHashedFiles(manifest) {
+    const cache = await caches.open(DATA_CACHE);
+    const referenced = new Set(
+        [...Object.values(manifest.files || {}), manifest.bundle, manifest.search]
+            .filter(Boolean)
+            .map(name => new URL(name, self.registration.scope).href)
+    );
+    const keys = await cache.keys();
+    await Promise.all(keys
+        .filter(req => new URL(req.url).pathname.startsWith(HASHED_PREFIX) && !referenced.has(req.url))
+        .map(req => cache.delete(req)));
+}
+
+async function cacheFirst(request, cacheName) {
+    const cache = await caches.open(cacheName);
+    const cached = await cache.match(cacheKey(request));
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (response.ok) await cache.put(cacheKey(request), response.clone());
+    return response;
+}
+
+async function staleWhileRevalidate(event, cacheName, notify) {
+    const request = event.request;
+    const cache = await caches.open(cacheName);
+    const key = cacheKey(request);
+    const cached = await cache.match(key);
+
+    const refresh = fetch(request.url, { cache: 'no-cache' }).then(async response => {
+        if (!response.ok) return response;
+        const fresh = await response.clone().text();
+        const old = cached ? await cached.clone().text() : null;
+        await cache.put(key, response.clone());
+        if (notify && old !== null && old !== fresh) {
+            const url = new URL(request.url);
+            if (url.pathname === MANIFEST_PATH) {
+                try { await trimHashedFiles(JSON.parse(fresh)); } catch (e) { /* 旧缓存清不掉不影响使用 */ }
+            }
+            await notifyClients({ type: 'menu-updated', url: url.pathname });
+        }
+        return response;
+    });
+
+    if (cached) {
+        event.waitUntil(refresh.catch(() => {}));
+        return cached;
+    }
+    return refresh;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) return;
+
+    if (url.pathname.startsWith(HASHED_PREFIX)) {
+        event.respondWith(cacheFirst(request, DATA_CACHE));
+    } else if (url.pathname.endsWith('.json')) {
+        event.respondWith(staleWhileRevalidate(event, DATA_CACHE, true));
+    } else {
+        event.respondWith(staleWhileRevalidate(event, STATIC_CACHE, false));
+    }
+});
@@ -0,0 +1,28 @@
+import pytest
+
+import archive
+
+PAYLOAD = {"sections": [{"section": "Deli", "date": "2024-09-02", "items": ["Wrap", "Wrap", " "]}]}
+
+
+def test_record_ignores_rows_already_archived(tmp_path):
+    path = str(tmp_path / "archive.sqlite")
+    rows = list(archive.rows_from_output(PAYLOAD))
+    assert archive.record("sac", rows, path) == 1
+    assert archive.record("sac", rows, path) == 0
+    assert archive.last_served("wrap", path=path) == [("Wrap", "sac", "2024-09-02", "", "Deli")]
+
+
+def test_missing_expected_archive_is_never_recreated(tmp_path, monkeypatch):
+    path = tmp_path / "archive.sqlite"
+    monkeypatch.setattr(archive, "ARCHIVE_PATH", str(path))
+    monkeypatch.setattr(archive, "EXPECTED", True)
+
+    with pytest.raises(archive.ArchiveMissing):
+        archive.check_expected()
+    archive.record_output("sac", PAYLOAD)
+    assert not path.exists()
+
+    monkeypatch.setattr(archive, "EXPECTED", False)
+    archive.record_output("sac", PAYLOAD)
+    assert path.exists()
@@ -0,0 +1,74 @@
+import datetime
+import json
+import re
+import sys
+
+import archive
+import backfill
+import nutrislice_client
+
+URL_DATE = re.compile(r"/(\d{4})/(\d{2})/(\d{2})/")
+
+
+def fake_week(url):
+    y, m, d = (int(x) for x in URL_DATE.search(url).groups())
+    week = datetime.date(y, m, d)
+    days = []
+    for i in range(7):
+        day = (week + datetime.timedelta(days=i)).isoformat()
+        days.append({"date": day, "menu_items": [{"food": {"name": f"Soup {day}"}}]})
+    return json.dumps({"days": days}).encode()
+
+
+def run_backfill(monkeypatch, tmp_path, start, end):
+    fetched = []
+
+    def get_json(url, parse=None):
+        fetched.append(url)
+        return parse(fake_week(url))
+
+    monkeypatch.setattr(nutrislice_client, "get_json", get_json)
+    monkeypatch.setattr(archive, "ARCHIVE_PATH", str(tmp_path / "archive.sqlite"))
+    # main() 会装上全局限速器；先登记原值，测试结束后还原
+    monkeypatch.setattr(nutrislice_client, "RATE_LIMITER", None)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "backfill.py", "--from", start, "--to", end, "--locations", "dental-cafe",
+            "--checkpoint", str(tmp_path / "checkpoint.json"), "--rate", "1000", "--burst", "100",
+        ],
+    )
+    assert backfill.main() == 0
+    return fetched
+
+
+def archived_days(tmp_path):
+    conn = archive.connect(str(tmp_path / "archive.sqlite"))
+    try:
+        return sorted(d for (d,) in conn.execute("SELECT DISTINCT menu_date FROM servings"))
+    finally:
+        conn.close()
+
+
+def test_day_keys_clip_to_range():
+    key = ("sac", "deli", datetime.date(2024, 9, 1))
+    assert backfill.day_keys(key, datetime.date(2024, 9, 3), datetime.date(2024, 9, 4)) == [
+        "sac/deli/2024-09-03",
+        "sac/deli/2024-09-04",
+    ]
+
+
+def test_wider_range_refetches_partially_archived_week(monkeypatch, tmp_path):
+    # 2024-09-01 是周日，一周 09-01 ~ 09-07
+    first = run_backfill(monkeypatch, tmp_path, "2024-09-03", "2024-09-04")
+    assert len(first) == 1
+    assert archived_days(tmp_path) == ["2024-09-03", "2024-09-04"]
+
+    # 同一周里还缺 09-02、09-05，必须重新取这一周，而不是当作已完成跳过
+    second = run_backfill(monkeypatch, tmp_path, "2024-09-02", "2024-09-05")
+    assert second == first
+    assert archived_days(tmp_path) == ["2024-09-02", "2024-09-03", "2024-09-04", "2024-09-05"]
+
+    # 完全覆盖的范围不再请求
+    assert run_backfill(monkeypatch, tmp_path, "2024-09-02", "2024-09-04") == []
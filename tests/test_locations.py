@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import locations
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("11am to 8pm", [[660, 1200]]),
+        ("7:30am – 12am", [[450, 1440]]),
+        ("11:30am to 10:30pm", [[690, 1350]]),
+        ("12pm to 7pm", [[720, 1140]]),
+        ("9am-5pm", [[540, 1020]]),
+        ("Closed", []),
+        ("", []),
+        (None, []),
+        ("Hours vary", None),
+        ("Open late", None),
+        ("8pm to 8am", []),
+    ],
+)
+def test_parse_hours(text, expected):
+    assert locations.parse_hours(text) == expected
+
+
+def test_weekly_slots_start_on_sunday():
+    slots = locations.weekly_slots({"weekday": "11am to 8pm", "fri": "11am to 3pm", "weekend": "Closed"})
+    assert [s["label"] for s in slots] == [
+        "Closed", "11am to 8pm", "11am to 8pm", "11am to 8pm", "11am to 8pm", "11am to 3pm", "Closed",
+    ]
+    assert slots[5] == {"label": "11am to 3pm", "open": [[660, 900]]}
+    assert locations.weekly_slots(None)[0] == {"label": "Hours vary", "open": None}
+
+
+def test_exception_slots():
+    slots = locations._exception_slots({
+        "2026-01-26": {"hall": "9am to 8pm", "stations": {"halal": "11:30am to 8pm", "*": "Closed"}},
+        "2026-01-27": {"stations": "Closed"},
+    })
+    assert slots == {
+        "2026-01-26": {
+            "hall": {"label": "9am to 8pm", "open": [[540, 1200]]},
+            "stations": {
+                "halal": {"label": "11:30am to 8pm", "open": [[690, 1200]]},
+                "*": {"label": "Closed", "open": []},
+            },
+        },
+        "2026-01-27": {"stations": {"label": "Closed", "open": []}},
+    }
+
+
+def test_write_manifest_is_minified(tmp_path):
+    path = tmp_path / "manifest.json"
+    locations.write_manifest(str(path), {"sac": "data/sac.0123456789.json"}, bundle_file="data/b.json")
+    text = path.read_text(encoding="utf-8")
+    manifest = json.loads(text)
+    assert manifest == dict(locations.build_manifest({"sac": "data/sac.0123456789.json"}), bundle="data/b.json")
+    assert text == json.dumps(manifest, ensure_ascii=False, separators=(",", ":"))
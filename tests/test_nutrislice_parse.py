@@ -0,0 +1,116 @@
+import json
+
+import pytest
+
+import nutrislice_parse
+
+WEEK = {
+    "start_date": "2024-09-01",
+    "days": [
+        {
+            "date": "2024-09-02",
+            "has_unpublished_menus": False,
+            "menu_items": [
+                {"is_section_title": True, "text": "Grill", "food": None, "image": "x.png"},
+                {
+                    "food": {"name": "Grilled Cheese", "rounded_nutrition_info": {"calories": 400}},
+                    "menu_category": {"name": "Other"},
+                    "price": 5.5,
+                },
+                {"food": {"name": "Grilled Cheese"}, "category": {"name": " Deli "}},
+                {"food": {}, "text": "  "},
+                "not an item",
+            ],
+        },
+        {"date": "2024-09-03", "menu_items": [{"is_holiday": True, "text": " Closed for Labor Day "}]},
+        {"date": "2024-09-04"},
+        {"date": "2024-09-05", "menu_items": None},
+        "junk",
+    ],
+    "menu_type_id": 1,
+}
+
+
+def parse(payload):
+    return nutrislice_parse.parse_week(json.dumps(payload).encode())
+
+
+def test_parse_week_keeps_only_walker_fields():
+    data = parse(WEEK)
+    assert [d["date"] for d in data["days"]] == ["2024-09-02", "2024-09-03", "2024-09-04", "2024-09-05"]
+    items = data["days"][0]["menu_items"]
+    assert items[0] == {"text": "Grill", "is_section_title": True}
+    assert items[1] == {"food": {"name": "Grilled Cheese"}, "menu_category": {"name": "Other"}}
+    # 空 food 保持为假值，walker 靠它识别标题行
+    assert items[3] == {"text": "  ", "food": {}}
+    assert items[4] == "not an item"
+    assert data["days"][2]["menu_items"] == []
+    assert data["days"][3]["menu_items"] == []
+
+
+def test_parse_week_shares_strings_within_one_week_only():
+    first = parse(WEEK)["days"][0]["menu_items"]
+    second = parse(WEEK)["days"][0]["menu_items"]
+    assert first[1]["food"]["name"] is first[2]["food"]["name"]
+    assert first[1]["food"]["name"] is not second[1]["food"]["name"]
+
+
+def test_parse_week_tolerates_unexpected_shapes():
+    assert parse([]) == {"days": []}
+    assert parse({"days": {"date": "2024-09-02"}}) == {"days": []}
+
+
+def test_parse_week_skips_subtrees_with_brackets_in_strings():
+    body = parse({
+        "meta": {"note": 'a "]}" b \\', "list": [1, {"x": "{["}], "n": None},
+        "days": [{"extra": ["]"], "date": "2024-09-02", "menu_items": [{"text": "[A]", "food": None}, 3]}],
+        "tail": -1.5e3,
+    })
+    assert body == {"days": [{"date": "2024-09-02", "menu_items": [{"text": "[A]"}, 3]}]}
+
+
+def test_parse_week_rejects_truncated_bodies():
+    for raw in (b'{"days": [', b'{"days": [{"date": "2024-09-02"', b'{"meta": {"a": "x'):
+        with pytest.raises(ValueError):
+            nutrislice_parse.parse_week(raw)
+
+
+def test_day_result_walks_sections_like_the_scrapers():
+    data = parse(WEEK)
+    status, _, items = nutrislice_parse.day_result(data, "2024-09-02", nutrislice_parse.IMPLICIT_HEADERS)
+    assert (status, items) == ("ok", ["Grilled Cheese"])
+
+    sections = nutrislice_parse.walk_sections(
+        data["days"][0]["menu_items"], nutrislice_parse.IMPLICIT_HEADERS
+    )
+    # "Other" 归到前面的标题下；SAC 和东西食堂的分类名原样保留
+    assert sections == {"Grill": ["Grilled Cheese"], " Deli ": ["Grilled Cheese"]}
+
+
+def test_strip_sections_trims_category_names():
+    items = [
+        {"is_section_title": True, "text": "Grill"},
+        {"food": {"name": "Burger"}, "category": {"name": " Deli "}},
+        {"food": {"name": "Fries"}, "category": {"name": "   "}},
+    ]
+    # Roth / Dental 用 FLAGGED_HEADERS，Jasmine 在 IMPLICIT_HEADERS 上单独打开
+    assert nutrislice_parse.walk_sections(items, nutrislice_parse.FLAGGED_HEADERS) == {
+        "Deli": ["Burger"],
+        "Grill": ["Fries"],
+    }
+    assert nutrislice_parse.walk_sections(items, nutrislice_parse.IMPLICIT_HEADERS) == {
+        " Deli ": ["Burger"],
+        "   ": ["Fries"],
+    }
+
+
+def test_day_result_reports_closed_and_missing_days():
+    data = parse(WEEK)
+    rules = nutrislice_parse.IMPLICIT_HEADERS
+    assert nutrislice_parse.day_result(data, "2024-09-03", rules, detect_closed=True) == (
+        "closed",
+        "Closed for Labor Day",
+        [],
+    )
+    assert nutrislice_parse.day_result(data, "2024-09-04", rules)[0] == "no_data_today"
+    assert nutrislice_parse.day_result(data, "2024-09-09", rules)[0] == "no_data_today"
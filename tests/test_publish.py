@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+import json
+import os
+
+import pytest
+
+import archive
+import async_fetch
+import publish
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(archive, "ENABLED", False)
+    return tmp_path
+
+
+def test_write_output_replaces_file_and_skips_unchanged_menu(site):
+    payload = {"updated_at": "2024-09-02 09:00", "status": "ok", "sections": [{"section": "Deli", "items": ["Wrap"]}]}
+    first = publish.write_output("sac.json", payload)
+    assert json.loads((site / "sac.json").read_text(encoding="utf-8")) == payload
+    assert (site / first).exists()
+
+    # 只有 updated_at 变了：文件和哈希副本都保持原样
+    second = publish.write_output("sac.json", dict(payload, updated_at="2024-09-02 10:00"))
+    assert second == first
+    assert json.loads((site / "sac.json").read_text(encoding="utf-8"))["updated_at"] == "2024-09-02 09:00"
+    assert not [name for name in os.listdir(site) if name.endswith(".tmp")]
+
+
+PREVIOUS = {
+    "updated_at": "2024-09-01 09:00",
+    "status": "ok",
+    "sections": [
+        {"section": "Deli", "status": "ok", "date": "2024-09-01", "items": ["Wrap"], "hours": "9am to 5pm"},
+        {"section": "Grill", "status": "fetch_error", "items": []},
+    ],
+}
+
+
+def test_fill_stale_reuses_last_published_section(site):
+    (site / "sac.json").write_text(json.dumps(PREVIOUS), encoding="utf-8")
+    sections = [
+        {"section": "Deli", "status": "stale", "date": "2024-09-02", "items": [], "hours": "10am to 4pm"},
+        {"section": "Grill", "status": "stale", "items": []},
+        {"section": "Noodles", "status": "ok", "items": ["Ramen"]},
+    ]
+    publish.fill_stale("sac.json", sections)
+
+    deli, grill, noodles = sections
+    assert deli["status"] == "stale"
+    assert deli["items"] == ["Wrap"] and deli["date"] == "2024-09-01"
+    # 营业时间等不在 STALE_FIELDS 里的字段保留本次的值
+    assert deli["hours"] == "10am to 4pm"
+    assert "2024-09-01" in deli["message"]
+    # 上次也没有可用菜单的档口只能报错
+    assert grill["status"] == "fetch_error"
+    assert noodles == {"section": "Noodles", "status": "ok", "items": ["Ramen"]}
+
+
+def test_fill_stale_without_previous_file(site):
+    sections = [{"section": "Deli", "status": "stale", "items": []}]
+    publish.fill_stale("sac.json", sections)
+    assert sections[0]["status"] == "fetch_error"
+
+
+def test_stale_output_for_single_menu_locations(site):
+    payload = {"updated_at": "2024-09-02 09:00", "status": "fetch_error", "sections": []}
+    assert publish.stale_output("dental_cafe.json", payload)["status"] == "fetch_error"
+
+    previous = {"updated_at": "2024-09-01 09:00", "status": "ok", "date": "2024-09-01", "sections": [{"items": ["Bagel"]}]}
+    (site / "dental_cafe.json").write_text(json.dumps(previous), encoding="utf-8")
+    out = publish.stale_output("dental_cafe.json", payload)
+    assert out["status"] == "stale"
+    assert out["sections"] == previous["sections"]
+    assert out["updated_at"] == "2024-09-02 09:00"
+    assert "2024-09-01" in out["message"]
+
+
+def test_unfinished_fetches_are_reported_stale():
+    async def slow():
+        await asyncio.sleep(5)
+
+    async def fast():
+        return "done"
+
+    results = asyncio.run(async_fetch._until([fast(), slow()], 0.05))
+    assert results[0] == "done"
+    assert isinstance(results[1], async_fetch.DeadlineExceeded)
+
+    section = async_fetch._failed(async_fetch._section("sac", "deli", datetime.date(2024, 9, 2)), results[1])
+    assert section["status"] == "stale"
+    assert async_fetch._failed({}, ValueError("boom"))["status"] == "fetch_error"
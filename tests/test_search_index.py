@@ -0,0 +1,80 @@
+import archive
+import search_index
+
+OUTPUTS = {
+    "east-hall": {
+        "date": "2024-09-02",
+        "meals": {
+            "lunch": [{"section": "Pizza Specials", "items": ["Pepperoni Pizza", "Crème Brûlée"]}],
+            "dinner": [{"section": "Pizza Specials", "items": ["Pepperoni Pizza"]}],
+        },
+    },
+    "sac": {
+        "date_fetched_from": "2024-09-02",
+        "sections": [
+            {"section": "Deli", "items": ["Turkey Club", "Pepperoni Pizza", "  "]},
+            {"section": "Chains", "type": "chain", "items": ["See website"]},
+        ],
+    },
+    "roth": None,
+}
+
+
+def test_tokenize_folds_accents_case_and_punctuation():
+    assert search_index.tokenize("Crème Brûlée") == ["creme", "brulee"]
+    assert search_index.tokenize("Mac & Cheese (V)") == ["mac", "cheese", "v"]
+    assert search_index.tokenize("  --  ") == []
+
+
+def test_trigrams():
+    assert search_index.trigrams("pizza") == ["piz", "izz", "zza"]
+    assert search_index.trigrams("bu") == []
+
+
+def test_build_index_postings():
+    index = search_index.build_index(OUTPUTS)
+    assert index["locations"] == ["east-hall", "sac", "roth"]
+    assert index["tokens"] == sorted(index["tokens"])
+
+    S = index["strings"]
+    entries = [(S[f], index["locations"][l], S[s], S[m]) for f, l, s, m in index["entries"]]
+    assert entries == [
+        ("Pepperoni Pizza", "east-hall", "Pizza Specials", "lunch"),
+        ("Crème Brûlée", "east-hall", "Pizza Specials", "lunch"),
+        ("Pepperoni Pizza", "east-hall", "Pizza Specials", "dinner"),
+        ("Turkey Club", "sac", "Deli", ""),
+        ("Pepperoni Pizza", "sac", "Deli", ""),
+    ]
+
+    postings = dict(zip(index["tokens"], index["postings"]))
+    assert postings["pizza"] == [0, 2, 4]
+    assert postings["creme"] == [1]
+    assert "see" not in postings
+    assert index["trigrams"]["izz"] == [index["tokens"].index("pizza")]
+
+
+def test_build_index_keeps_stale_sections():
+    outputs = {
+        "sac": {
+            "date_fetched_from": "2024-09-02",
+            "sections": [
+                {"section": "Deli", "status": "stale", "items": ["Turkey Club"]},
+                {"section": "Grill", "status": "error", "items": ["Burger"]},
+            ],
+        },
+    }
+    index = search_index.build_index(outputs)
+    S = index["strings"]
+    assert [S[f] for f, _, _, _ in index["entries"]] == ["Turkey Club"]
+    # 归档仍然只收 "ok"
+    assert list(archive.rows_from_output(outputs["sac"])) == []
+
+
+def test_search_prefix_infix_and_all_words():
+    index = search_index.build_index(OUTPUTS)
+    assert search_index.search(index, "pep") == [0, 2, 4]
+    assert search_index.search(index, "izza") == [0, 2, 4]
+    assert search_index.search(index, "pizza turkey") == []
+    assert search_index.search(index, "CRÈME") == [1]
+    assert search_index.search(index, "tu club") == [3]
+    assert search_index.search(index, "") == []
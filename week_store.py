@@ -0,0 +1,193 @@
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Any, Dict, Optional, Tuple
+
+import nutrislice_client
+import nutrislice_parse
+
+STORE_DIR = os.path.join(os.environ.get("WOLFIE_CACHE_DIR", ".cache"), "weeks")
+
+# 开启后：同一 (school, menu_type, week) 一周只请求一次，其余几天直接读本地
+WEEK_MODE = os.environ.get("WOLFIE_WEEK_MODE") == "1"
+
+# 本地周数据的最长使用期限；过期后即使在 WEEK_MODE 下也会重新请求
+MAX_AGE_SECONDS = 7 * 24 * 3600
+
+_write_lock = threading.Lock()
+
+# (school, menu_type, 周日的日期)；同一周内任何一天的请求都返回这一整周
+WeekKey = Tuple[str, str, str]
+
+# 本次运行内已取到的整周结果，多个档口/地点/线程共用，调用方只读不改
+_memo: Dict[WeekKey, Dict[str, Any]] = {}
+
+# 正在请求中的周：后来者等同一个 Future，不再发第二个请求（single-flight）
+_inflight: Dict[WeekKey, "Future[Dict[str, Any]]"] = {}
+_flight_lock = threading.Lock()
+
+
+def week_start(d: datetime.date) -> datetime.date:
+    """Nutrislice weeks run Sunday..Saturday."""
+    return d - datetime.timedelta(days=(d.weekday() + 1) % 7)
+
+
+def _week_dir(school: str, menu_type: str, d: datetime.date) -> str:
+    return os.path.join(STORE_DIR, school, menu_type, week_start(d).strftime("%Y-%m-%d"))
+
+
+def week_key(school: str, menu_type: str, d: datetime.date) -> WeekKey:
+    return (school, menu_type, week_start(d).isoformat())
+
+
+def load_week(school: str, menu_type: str, d: datetime.date) -> Optional[Dict[str, Any]]:
+    """Stored payload for the week containing d, or None if the week is not stored."""
+    week_dir = _week_dir(school, menu_type, d)
+    try:
+        with open(os.path.join(week_dir, "_week.json"), "r", encoding="utf-8") as f:
+            marker = json.load(f)
+        # API 里没有的日子就没有对应的文件
+        names = sorted(n for n in os.listdir(week_dir) if n != "_week.json" and n.endswith(".json"))
+        days = []
+        for name in names:
+            with open(os.path.join(week_dir, name), "r", encoding="utf-8") as f:
+                days.append(json.load(f))
+    except (OSError, ValueError):
+        return None
+    if time.time() - marker.get("fetched_at", 0) > MAX_AGE_SECONDS:
+        return None
+    return {"days": days}
+
+
+def save_week(school: str, menu_type: str, d: datetime.date, data: Dict[str, Any]) -> None:
+    """Split a weekly payload into one file per day under its week directory."""
+    week_dir = _week_dir(school, menu_type, d)
+    tmp_dir = f"{week_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    for day in data.get("days", []):
+        date_str = day.get("date")
+        if not isinstance(date_str, str):
+            continue
+        with open(os.path.join(tmp_dir, date_str + ".json"), "w", encoding="utf-8") as f:
+            json.dump(day, f, ensure_ascii=False, separators=(",", ":"))
+
+    with open(os.path.join(tmp_dir, "_week.json"), "w", encoding="utf-8") as f:
+        json.dump({"fetched_at": time.time()}, f)
+
+    with _write_lock:
+        shutil.rmtree(week_dir, ignore_errors=True)
+        os.replace(tmp_dir, week_dir)
+        prune(school, menu_type)
+
+
+def prune(school: str, menu_type: str) -> None:
+    base = os.path.join(STORE_DIR, school, menu_type)
+    try:
+        names = os.listdir(base)
+    except OSError:
+        return
+    now = time.time()
+    for name in names:
+        week_dir = os.path.join(base, name)
+        try:
+            age = now - os.path.getmtime(os.path.join(week_dir, "_week.json"))
+        except OSError:
+            age = MAX_AGE_SECONDS + 1
+        if age > MAX_AGE_SECONDS * 3:
+            shutil.rmtree(week_dir, ignore_errors=True)
+
+
+def lookup(school: str, menu_type: str, d: datetime.date) -> Optional[Dict[str, Any]]:
+    """Payload available without network I/O: fetched earlier this run, or stored (WEEK_MODE only)."""
+    key = week_key(school, menu_type, d)
+    hit = _memo.get(key)
+    if hit is not None:
+        return hit
+    if WEEK_MODE:
+        data = load_week(school, menu_type, d)
+        if data is not None:
+            with _flight_lock:
+                return _memo.setdefault(key, data)
+    return None
+
+
+def claim(school: str, menu_type: str, d: datetime.date) -> Tuple["Future[Dict[str, Any]]", bool]:
+    """The fetch of d's week, and whether the caller owns it.
+
+    The owner must perform the fetch and end it with remember() or fail();
+    everyone else waits on the returned Future.
+    """
+    key = week_key(school, menu_type, d)
+    with _flight_lock:
+        hit = _memo.get(key)
+        if hit is not None:
+            done: "Future[Dict[str, Any]]" = Future()
+            done.set_result(hit)
+            return done, False
+        fut = _inflight.get(key)
+        if fut is not None:
+            return fut, False
+        fut = _inflight[key] = Future()
+        return fut, True
+
+
+def remember(school: str, menu_type: str, d: datetime.date, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Store a freshly fetched week, share it for the rest of the run and wake any waiters."""
+    try:
+        save_week(school, menu_type, d, data)
+    except OSError as e:
+        print(f"Could not store week {school}/{menu_type}: {e}")
+    key = week_key(school, menu_type, d)
+    with _flight_lock:
+        _memo[key] = data
+        fut = _inflight.pop(key, None)
+    if fut is not None and not fut.done():
+        fut.set_result(data)
+    return data
+
+
+def fail(school: str, menu_type: str, d: datetime.date, exc: BaseException) -> None:
+    """End an owned fetch with an error; waiters get it, the next caller tries again."""
+    with _flight_lock:
+        fut = _inflight.pop(week_key(school, menu_type, d), None)
+    if fut is None or fut.done():
+        return
+    if not isinstance(exc, Exception):
+        # 取消/中断只属于发起请求的那一方，等待者看到的是普通的请求失败
+        exc = RuntimeError(f"Fetch of {school}/{menu_type} was interrupted")
+    fut.set_exception(exc)
+
+
+def get_week(school: str, menu_type: str, d: datetime.date, url: Optional[str] = None) -> Dict[str, Any]:
+    """Weekly payload for the week containing d.
+
+    Results are shared read-only for the rest of the run, and concurrent
+    callers for the same week wait for a single request. In WEEK_MODE a week
+    that was already fetched is served from the local store without any
+    network I/O. Every network fetch refreshes the store.
+    """
+    data = lookup(school, menu_type, d)
+    if data is not None:
+        return data
+    fut, owner = claim(school, menu_type, d)
+    if not owner:
+        try:
+            return fut.result(timeout=nutrislice_client.time_left())
+        except FutureTimeout:
+            raise nutrislice_client.DeadlineExceeded(
+                f"Run deadline reached waiting for {school}/{menu_type}"
+            ) from None
+    try:
+        data = nutrislice_client.get_json(
+            url or nutrislice_client.week_url(school, menu_type, d),
+            parse=nutrislice_parse.parse_week,
+        )
+    except BaseException as e:
+        fail(school, menu_type, d, e)
+        raise
+    return remember(school, menu_type, d, data)